@@ -0,0 +1,45 @@
+import timeit
+
+from jwcrypto import jwk
+from ecdsa.keys import SigningKey
+from ecdsa.curves import SECP256k1
+
+from alastria_identity.services import (
+    TokenService, KeyCache, JwcryptoBackend, CoincurveBackend)
+from alastria_identity.services.crypto_backends import coincurve
+
+PRIVATE_KEY = '1da6847600b0ee25e9ad9a52abbd786dd2502fa4005dd5af9310b7cc7a3b25db'
+ROUNDS = 200
+
+
+def pem_round_trip():
+    # How TokenService used to build its signing key
+    pem = SigningKey.from_string(
+        bytes.fromhex(PRIVATE_KEY), curve=SECP256k1).to_pem()
+    return jwk.JWK.from_pem(pem)
+
+
+def uncached_construction(backend):
+    # A fresh registry every time forces the key to be built again
+    return lambda: TokenService(
+        PRIVATE_KEY, backend=backend, signing_key_registry=KeyCache())
+
+
+def report(name, function):
+    seconds = timeit.timeit(function, number=ROUNDS)
+    print(f'{name:<40} {seconds / ROUNDS * 1e6:>10.1f} us per call')
+
+
+def main():
+    report('PEM round trip (before)', pem_round_trip)
+    report('TokenService jwcrypto, no registry', uncached_construction(JwcryptoBackend()))
+
+    if coincurve is not None:
+        report('TokenService coincurve, no registry', uncached_construction(CoincurveBackend()))
+
+    TokenService(PRIVATE_KEY)
+    report('TokenService, registry hit', lambda: TokenService(PRIVATE_KEY))
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,6 @@
 class ContractNameError(Exception): pass
+class InvalidTokenError(Exception): pass
+class ConfigTimeoutError(Exception): pass
+class CacheMissError(Exception): pass
+class InvalidSnapshotError(Exception): pass
+class TransactionSubmissionError(Exception): pass
@@ -1,6 +1,20 @@
+from .abi_encoder import AbiEncoder
+from .calldata_decoder import CalldataDecoder
 from .config_builder import IdentityConfigBuilder
+from .config_snapshot import ConfigSnapshot
 from .contracts import ContractsService
+from .crypto_backends import JwcryptoBackend, CoincurveBackend
+from .http_cache import HttpCache
+from .http_session import build_session
 from .identity import UserIdentityService
+from .key_cache import KeyCache
+from .live_config import LiveConfig, ConfigRefresher
+from .local_parsers import AbiBundle, LocalContractParser
+from .nonce_manager import NonceManager
 from .parsers import ContractParser
+from .receipt_tracker import ReceiptTracker
+from .replay import JtiReplayIndex, SqliteReplayIndex
+from .submitter import TransactionSubmitter
 from .tokens import TokenService
 from .transaction_service import TransactionService
+from .verification import TokenVerifier
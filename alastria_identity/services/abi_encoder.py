@@ -0,0 +1,190 @@
+from collections import defaultdict
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from eth_abi.codec import ABICodec
+from eth_abi.grammar import TupleType, parse
+from eth_utils import (
+    function_abi_to_4byte_selector, hexstr_if_str, is_binary_address,
+    text_if_str, to_bytes, to_checksum_address, to_text)
+from eth_utils.abi import collapse_if_tuple
+from web3._utils.abi import build_default_registry
+from web3._utils.validation import validate_address
+from web3.exceptions import ValidationError
+
+from .key_cache import KeyCache
+
+
+class AbiFunction:
+    '''
+        Everything needed to encode a call to one function, computed once:
+        its selector, argument types and argument normalizers.
+    '''
+
+    def __init__(self, abi: dict):
+        self.abi = abi
+        self.name = abi['name']
+        self.types = [collapse_if_tuple(item) for item in abi.get('inputs', [])]
+        self.selector = function_abi_to_4byte_selector(abi)
+        self.signature = f'{self.name}({",".join(self.types)})'
+        self.normalizers = [get_normalizer(parse(type_str)) for type_str in self.types]
+
+    def is_encodable(self, codec: ABICodec, args: Sequence[Any]) -> bool:
+        return len(args) == len(self.types) and all(
+            codec.is_encodable(type_str, arg)
+            for type_str, arg in zip(self.types, args))
+
+    def normalize(self, args: Sequence[Any]) -> list:
+        return [
+            normalizer(arg) if normalizer is not None else arg
+            for normalizer, arg in zip(self.normalizers, args)
+        ]
+
+
+class AbiEncoder:
+    '''
+        Encodes function calls of a contract straight with eth_abi, the
+        same way Contract.encodeABI does but without resolving the function
+        and its types on every call.
+
+        Arguments are validated and normalized like web3 does: addresses
+        must be checksummed, hex strings are accepted for bytes arguments
+        and overloads are told apart by the arguments they can encode. ENS
+        names are not resolved.
+    '''
+    PREFIX_CACHE_SIZE = 256
+
+    def __init__(self, functions: Iterable[dict], codec: ABICodec = None):
+        self.codec = codec or ABICodec(build_default_registry())
+        self.functions = defaultdict(list)
+        self._prefixes = KeyCache(maxsize=self.PREFIX_CACHE_SIZE)
+
+        for item in functions:
+            if item.get('type', 'function') == 'function' and 'name' in item:
+                self.functions[item['name']].append(AbiFunction(item))
+
+    @classmethod
+    def from_config(cls, config, contract_name: str, codec: ABICodec = None) -> 'AbiEncoder':
+        return cls(config[contract_name]['functions'].values(), codec)
+
+    def encode(self, function_name: str, args: Optional[Sequence[Any]] = None) -> str:
+        return '0x' + self.encode_bytes(function_name, args).hex()
+
+    def encode_bytes(self, function_name: str, args: Optional[Sequence[Any]] = None) -> bytes:
+        args = args or ()
+        function = self.get_function(function_name, args)
+
+        return function.selector + self.codec.encode_abi(
+            function.types, function.normalize(args))
+
+    def encode_with_bytes(self, function_name: str, args: Sequence[Any], data: bytes) -> bytes:
+        '''
+            Same as encode_bytes(function_name, [*args, data]) for functions
+            whose only dynamic argument is a trailing bytes one, such as
+            delegateCall. Everything before data is encoded once per args,
+            later calls only append its length and padded content. The last
+            PREFIX_CACHE_SIZE prefixes are kept, args that can't be hashed,
+            such as lists, are encoded every time.
+        '''
+        key = (function_name, tuple(args))
+
+        try:
+            hash(key)
+        except TypeError:
+            prefix = self.get_bytes_prefix(function_name, args)
+        else:
+            prefix = self._prefixes.get_or_load(
+                key, partial(self.get_bytes_prefix, function_name, args))
+
+        return prefix + encode_bytes_tail(normalize_bytes(data))
+
+    def get_bytes_prefix(self, function_name: str, args: Sequence[Any]) -> bytes:
+        args = [*args, b'']
+        function = self.get_function(function_name, args)
+        types = [parse(type_str) for type_str in function.types]
+
+        if types[-1].to_type_str() != 'bytes' or any(item.is_dynamic for item in types[:-1]):
+            raise ValueError(
+                f'{function.signature} does not end in its only dynamic bytes argument')
+
+        # The empty bytes are encoded as a zero length word and a zero word
+        return self.encode_bytes(function_name, args)[:-64]
+
+    def get_function(self, function_name: str, args: Sequence[Any]) -> AbiFunction:
+        candidates = self.functions.get(function_name, [])
+        matches = [
+            function for function in candidates
+            if function.is_encodable(self.codec, args)
+        ]
+
+        if len(matches) == 1:
+            return matches[0]
+
+        signatures = ', '.join(function.signature for function in candidates)
+
+        if not candidates:
+            diagnosis = 'no function has that name'
+        elif not matches:
+            diagnosis = 'the arguments do not match any of them'
+        else:
+            diagnosis = 'the arguments can be encoded to several of them'
+
+        raise ValidationError(
+            f'Could not identify the function {function_name} called with '
+            f'{len(args)} argument(s), found [{signatures}] but {diagnosis}')
+
+
+def get_normalizer(abi_type) -> Optional[Callable[[Any], Any]]:
+    '''
+        Normalizer for the values of abi_type, None when they are encoded
+        as given
+    '''
+    if abi_type.is_array:
+        item_normalizer = get_normalizer(abi_type.item_type)
+
+        if item_normalizer is None:
+            return None
+        return lambda values: [item_normalizer(value) for value in values]
+
+    if isinstance(abi_type, TupleType):
+        normalizers = [get_normalizer(component) for component in abi_type.components]
+
+        if not any(normalizers):
+            return None
+        return lambda values: tuple(
+            normalizer(value) if normalizer is not None else value
+            for normalizer, value in zip(normalizers, values))
+
+    if abi_type.base == 'address':
+        return normalize_address
+    if abi_type.base == 'bytes':
+        return normalize_bytes
+    if abi_type.base == 'string':
+        return normalize_string
+
+    return None
+
+
+def encode_bytes_tail(data: bytes) -> bytes:
+    # eth_abi pads empty bytes to a whole word too
+    padding = -len(data) % 32 if data else 32
+    return len(data).to_bytes(32, 'big') + data + bytes(padding)
+
+
+def normalize_address(value: Any) -> Any:
+    validate_address(value)
+
+    if is_binary_address(value):
+        return to_checksum_address(value)
+    return value
+
+
+def normalize_bytes(value: Any) -> bytes:
+    if type(value) is bytes:
+        return value
+    return hexstr_if_str(to_bytes, value)
+
+
+def normalize_string(value: Any) -> str:
+    return text_if_str(to_text, value)
+
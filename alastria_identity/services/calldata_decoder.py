@@ -0,0 +1,210 @@
+from collections import defaultdict
+from functools import partial
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import rlp
+from eth_abi.codec import ABICodec
+from eth_abi.exceptions import DecodingError
+from web3._utils.abi import build_default_registry
+
+from alastria_identity.types import DecodedCall
+from .abi_encoder import AbiFunction, normalize_bytes
+from .executors import (
+    SERIAL_EXECUTOR, PROCESS_EXECUTOR, DEFAULT_CHUNK_SIZE, map_chunks)
+
+
+LEGACY_TRANSACTION_TYPE = 0
+# Field count and positions of the nonce and the destination of legacy,
+# EIP-2930 and EIP-1559 transactions
+TRANSACTION_FIELDS = {0: (9, 0, 3), 1: (11, 1, 4), 2: (12, 1, 5)}
+
+
+class CalldataDecoder:
+    '''
+        Turns calldata back into the function it calls and its arguments
+        using a selector index built once from the config. Calls made
+        through delegateCall are unwrapped recursively, the contract of the
+        inner call is found by its destination address.
+
+        Arguments are returned as eth_abi decodes them, addresses are
+        lowercase hex strings. Calldata that can't be decoded gives a
+        DecodedCall with its error set instead of raising, so one bad
+        transaction does not stop a stream.
+    '''
+    DELEGATED_FUNCTION_NAME = 'delegateCall'
+    MAX_DEPTH = 8
+
+    def __init__(self, config: Mapping, codec: ABICodec = None):
+        self.codec = codec or ABICodec(build_default_registry())
+        self.config = config
+        self.selectors = defaultdict(list)
+        self.addresses = {}
+
+        for contract_name, contract in config.items():
+            self.addresses[contract['address'].lower()] = contract_name
+
+            for item in contract['functions'].values():
+                if item.get('type', 'function') == 'function' and 'name' in item:
+                    function = AbiFunction(item)
+                    self.selectors[function.selector].append((contract_name, function))
+
+    def decode(self, calldata, to: str = None) -> DecodedCall:
+        '''
+            calldata is bytes or a hex string, to the address it was sent
+            to, used to choose between contracts sharing a selector
+        '''
+        try:
+            calldata = normalize_bytes(calldata)
+        except (TypeError, ValueError) as error:
+            return DecodedCall('0x', error=f'Invalid calldata: {error}')
+
+        contract_name = self.addresses.get(to.lower()) if to else None
+        return self.decode_call(calldata, contract_name, 0)
+
+    def decode_transaction(self, raw_transaction) -> DecodedCall:
+        '''
+            Decodes the call of a signed legacy, EIP-2930 or EIP-1559
+            transaction, as bytes or a hex string
+        '''
+        try:
+            to, calldata = get_transaction_call(normalize_bytes(raw_transaction))
+        except (rlp.DecodingError, TypeError, ValueError, IndexError) as error:
+            return DecodedCall('0x', error=f'Invalid transaction: {error}')
+
+        return self.decode(calldata, to)
+
+    def decode_many(
+        self,
+        items: Iterable,
+        signed: bool = False,
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int = None
+    ) -> Iterator[DecodedCall]:
+        '''
+            Decodes every calldata, or every signed transaction with
+            signed, and yields the calls in input order. Process workers
+            build their own decoder from the config when they start.
+        '''
+        if executor == PROCESS_EXECUTOR:
+            return map_chunks(
+                partial(decode_chunk, signed=signed), items, executor=executor,
+                max_workers=max_workers, chunk_size=chunk_size,
+                max_in_flight=max_in_flight,
+                initializer=init_decoder_worker,
+                initargs=(self.get_worker_config(),))
+
+        return map_chunks(
+            partial(self.decode_chunk, signed=signed), items, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size,
+            max_in_flight=max_in_flight)
+
+    def decode_chunk(self, chunk: List[Any], signed: bool = False) -> List[DecodedCall]:
+        if signed:
+            return [self.decode_transaction(raw_transaction) for raw_transaction in chunk]
+        return [self.decode(calldata) for calldata in chunk]
+
+    def decode_call(
+        self, calldata: bytes, contract_name: Optional[str], depth: int
+    ) -> DecodedCall:
+        selector = calldata[:4]
+
+        if len(selector) < 4:
+            return DecodedCall(
+                '0x' + selector.hex(), error='Calldata is shorter than a selector')
+
+        candidates = self.selectors.get(selector)
+
+        if not candidates:
+            return DecodedCall('0x' + selector.hex())
+
+        contract_name, function = next(
+            (candidate for candidate in candidates if candidate[0] == contract_name),
+            candidates[0])
+        call = DecodedCall(
+            '0x' + selector.hex(), contract_name, function.name)
+
+        try:
+            call.args = tuple(self.codec.decode_abi(function.types, calldata[4:]))
+        except DecodingError as error:
+            call.error = str(error)
+            return call
+
+        if function.name == self.DELEGATED_FUNCTION_NAME and depth < self.MAX_DEPTH:
+            destination, data = call.args[0], call.args[-1]
+            call.inner = self.decode_call(
+                data, self.addresses.get(destination.lower()), depth + 1)
+
+        return call
+
+    def get_worker_config(self) -> dict:
+        return {
+            contract_name: {
+                'functions': dict(contract['functions']),
+                'address': contract['address']
+            }
+            for contract_name, contract in self.config.items()
+        }
+
+
+def get_transaction_fields(raw_transaction: bytes) -> Tuple[int, list]:
+    '''
+        Type and RLP fields of a signed transaction, legacy transactions
+        are type 0
+    '''
+    transaction_type = raw_transaction[0]
+
+    if transaction_type >= 0xc0:
+        transaction_type, payload = LEGACY_TRANSACTION_TYPE, raw_transaction
+    elif transaction_type != LEGACY_TRANSACTION_TYPE and transaction_type in TRANSACTION_FIELDS:
+        payload = raw_transaction[1:]
+    else:
+        raise ValueError(f'Unsupported transaction type {transaction_type}')
+
+    fields = rlp.decode(payload)
+    field_count = TRANSACTION_FIELDS[transaction_type][0]
+
+    if not isinstance(fields, list) or len(fields) != field_count:
+        raise ValueError(
+            f'A type {transaction_type} transaction has {field_count} fields')
+
+    return transaction_type, fields
+
+
+def get_transaction_call(raw_transaction: bytes) -> Tuple[Optional[str], bytes]:
+    '''
+        Destination and calldata of a signed transaction, the destination
+        is None for contract creations
+    '''
+    transaction_type, fields = get_transaction_fields(raw_transaction)
+    to_position = TRANSACTION_FIELDS[transaction_type][2]
+    # The value sits between the destination and the calldata
+    to, calldata = fields[to_position], fields[to_position + 2]
+
+    if not isinstance(to, bytes) or not isinstance(calldata, bytes):
+        raise ValueError('The destination and calldata must be byte strings')
+
+    return ('0x' + to.hex() if to else None), calldata
+
+
+def get_transaction_nonce(raw_transaction: bytes) -> int:
+    transaction_type, fields = get_transaction_fields(raw_transaction)
+    nonce = fields[TRANSACTION_FIELDS[transaction_type][1]]
+
+    if not isinstance(nonce, bytes):
+        raise ValueError('The nonce must be a byte string')
+
+    return int.from_bytes(nonce, 'big')
+
+
+_worker_decoder = None
+
+
+def init_decoder_worker(config: dict) -> None:
+    global _worker_decoder
+    _worker_decoder = CalldataDecoder(config)
+
+
+def decode_chunk(chunk: List[Any], signed: bool = False) -> List[DecodedCall]:
+    return _worker_decoder.decode_chunk(chunk, signed)
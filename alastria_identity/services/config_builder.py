@@ -1,21 +1,71 @@
-from typing import List
+from typing import List, Optional
 import re
+import time
+import asyncio
+from functools import partial
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 import requests
 
 from .parsers import ContractParser
-from alastria_identity.types import ConfigParser
+from .http_cache import HttpCache
+from .local_parsers import AbiBundle, LocalContractParser
+from .live_config import LiveConfig
+from .http_session import get_default_session
+from alastria_identity.types import ConfigParser, ConfigChanges
+from alastria_identity.exceptions import ConfigTimeoutError
 
 
 class IdentityConfigBuilder:
     CONTRACT_NAME_REGEX = r'sol_(?P<name>.*)\.abi'
     CONTRACT_URL_POSITION = -2
     ADDRESS_POSITION = -3
+    DEFAULT_MAX_WORKERS = 8
 
-    def __init__(self, contracts_info_url: str, parser_class: ConfigParser):
+    def __init__(
+        self,
+        contracts_info_url: str,
+        parser_class: ConfigParser,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        request_timeout: float = None,
+        timeout: float = None,
+        cache: HttpCache = None,
+        session: requests.Session = None
+    ):
+        '''
+            max_workers limits how many ABIs are fetched at the same time,
+            request_timeout applies to every request and timeout to the
+            whole generation. With a cache ContractInfo.md and the ABIs are
+            revalidated against their local copies. Every request goes
+            through session, a process wide pooled session by default.
+        '''
         self.parser_class = parser_class
         self.contracts_info_url = contracts_info_url
+        self.max_workers = max_workers
+        self.request_timeout = request_timeout
+        self.timeout = timeout
+        self.cache = cache
+        self.session = session
+        self.bundle = None
+
+    @classmethod
+    def from_bundle(
+        cls, path: str, contracts_info_name: str = 'ContractInfo.md', **kwargs
+    ) -> 'IdentityConfigBuilder':
+        '''
+            Builder reading ContractInfo.md and the ABIs from a directory or
+            archive laid out like the upstream repository, without any
+            request. See AbiBundle.
+        '''
+        bundle = AbiBundle(path)
+        builder = cls(
+            contracts_info_url=contracts_info_name,
+            parser_class=partial(LocalContractParser, bundle=bundle),
+            **kwargs)
+        builder.bundle = bundle
+        return builder
 
     def generate(self):
         '''
@@ -23,23 +73,188 @@ class IdentityConfigBuilder:
             - Functions are the ones interesting for generating transactions
             - Addresses will be used to point to the right contract also using
               its name
+
+            timeout covers fetching ContractInfo.md too.
         '''
-        config = defaultdict(dict)
-        contracts = self.get_contracts()
+        deadline = self.get_deadline()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        try:
+            contracts = self.fetch_contracts(pool, deadline)
+            return self.build_config(
+                contracts, self.parse_contracts(contracts, pool, deadline))
+        finally:
+            pool.shutdown(wait=False)
+
+    def refresh(self, config: LiveConfig) -> ConfigChanges:
+        '''
+            Diffs ContractInfo.md against the url and address every contract
+            of config was built from, fetches only the ABIs of new contracts
+            or whose url or address changed, since a redeployed contract
+            keeps its url, and swaps the updated config in at once. An
+            empty LiveConfig is filled on its first refresh. timeout covers
+            the whole refresh, ContractInfo.md included.
+        '''
+        deadline = self.get_deadline()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
 
-        for contract_item in contracts:
-            name = re.search(
-                self.CONTRACT_NAME_REGEX,
-                contract_item['url']
-            ).group('name')
+        try:
+            return self.refresh_with(config, pool, deadline)
+        finally:
+            pool.shutdown(wait=False)
+
+    def refresh_with(
+        self,
+        config: LiveConfig,
+        pool: ThreadPoolExecutor,
+        deadline: Optional[float]
+    ) -> ConfigChanges:
+        contracts = {
+            self.get_contract_name(contract_item['url']): contract_item
+            for contract_item in self.fetch_contracts(pool, deadline)
+        }
+        version, current, sources = config.state()
+        changes = ConfigChanges(
+            added=[name for name in contracts if name not in sources],
+            changed=[
+                name for name, contract_item in contracts.items()
+                if name in sources and sources[name] != contract_item
+            ],
+            removed=[name for name in sources if name not in contracts],
+            version=version)
+
+        if not changes:
+            return changes
+
+        outdated = [
+            name for name in contracts
+            if name in changes.added or name in changes.changed
+        ]
+        functions = dict(zip(
+            outdated,
+            self.parse_contracts(
+                [contracts[name] for name in outdated], pool, deadline)))
+        updated = {
+            name: {
+                'functions': functions[name] if name in functions else current[name]['functions'],
+                'address': contract_item['address']
+            }
+            for name, contract_item in contracts.items()
+        }
+        changes.version = config.swap(updated, contracts)
+
+        return changes
+
+    def get_deadline(self) -> Optional[float]:
+        if self.timeout is None:
+            return None
+        return time.monotonic() + self.timeout
+
+    def fetch_contracts(
+        self, pool: ThreadPoolExecutor, deadline: Optional[float]
+    ) -> List[dict]:
+        future = pool.submit(self.get_contracts)
+
+        try:
+            return future.result(timeout=get_remaining(deadline))
+        except FutureTimeoutError:
+            future.cancel()
+            raise ConfigTimeoutError(
+                f'ContractInfo.md was not fetched in {self.timeout} seconds')
+
+    def parse_contracts(
+        self,
+        contracts: List[dict],
+        pool: ThreadPoolExecutor,
+        deadline: Optional[float]
+    ) -> List[dict]:
+        futures = [
+            pool.submit(self.parse_contract, contract_item)
+            for contract_item in contracts
+        ]
+        _, not_done = wait(futures, timeout=get_remaining(deadline))
 
-            config[name]['functions'] = self.parser_class(contract_item['url']).parse()
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise ConfigTimeoutError(
+                f'{len(not_done)} contracts were not fetched in {self.timeout} seconds')
+
+        return [future.result() for future in futures]
+
+    async def generate_async(self):
+        '''
+            Same as generate for asyncio applications. Parsers are
+            synchronous so they run in the loop default executor, at most
+            max_workers at a time.
+        '''
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def parse(contract_item):
+            async with semaphore:
+                return await loop.run_in_executor(
+                    None, self.parse_contract, contract_item)
+
+        async def fetch_all():
+            contracts = await loop.run_in_executor(None, self.get_contracts)
+            functions = await asyncio.gather(*map(parse, contracts))
+            return self.build_config(contracts, functions)
+
+        try:
+            return await asyncio.wait_for(fetch_all(), self.timeout)
+        except asyncio.TimeoutError:
+            raise ConfigTimeoutError(
+                f'The config was not generated in {self.timeout} seconds')
+
+    def build_config(self, contracts: List[dict], functions: List[dict]):
+        config = defaultdict(dict)
+
+        for contract_item, contract_functions in zip(contracts, functions):
+            name = self.get_contract_name(contract_item['url'])
+            config[name]['functions'] = contract_functions
             config[name]['address'] = contract_item['address']
 
         return config
 
+    def parse_contract(self, contract_item: dict) -> dict:
+        return self.build_parser(contract_item['url']).parse()
+
+    def build_parser(self, contract_url: str) -> ConfigParser:
+        # Only pass the options that were set, custom parser classes may
+        # just take the url
+        parser_kwargs = {}
+
+        if self.request_timeout is not None:
+            parser_kwargs['timeout'] = self.request_timeout
+        if self.cache is not None:
+            parser_kwargs['cache'] = self.cache
+        if self.session is not None:
+            parser_kwargs['session'] = self.session
+
+        return self.parser_class(contract_url, **parser_kwargs)
+
+    def get_contract_name(self, contract_url: str) -> str:
+        return re.search(
+            self.CONTRACT_NAME_REGEX,
+            contract_url
+        ).group('name')
+
     def get_contracts(self) -> List[str]:
-        contracts_raw_response = requests.get(self.contracts_info_url)
+        if self.bundle is not None:
+            return list(self.extract_contract_item_from_response(
+                self.bundle.read(self.contracts_info_url).decode('utf-8')))
+
+        session = self.session or get_default_session()
+
+        if self.cache is not None:
+            contracts_raw_response = self.cache.get(
+                self.contracts_info_url, timeout=self.request_timeout,
+                session=session)
+        else:
+            contracts_raw_response = session.get(
+                self.contracts_info_url, timeout=self.request_timeout)
+
         return list(self.extract_contract_item_from_response(
             contracts_raw_response.content.decode('utf-8')))
 
@@ -53,3 +268,9 @@ class IdentityConfigBuilder:
             },
             contracts_content.split('\n')[2:-1]
         )
+
+
+def get_remaining(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
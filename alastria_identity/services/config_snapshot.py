@@ -0,0 +1,138 @@
+import os
+import json
+import mmap
+import hashlib
+import tempfile
+import threading
+from collections.abc import Mapping
+
+from alastria_identity.exceptions import InvalidSnapshotError
+
+
+class ConfigSnapshot(Mapping):
+    '''
+        Read only config loaded from a snapshot file written by
+        ConfigSnapshot.write, it can be given to ContractsService and
+        TransactionService instead of the generated config.
+
+        The file holds a magic line, a JSON index and the functions of every
+        contract serialized one after the other. Loading only reads the
+        index and maps the rest of the file, the functions of a contract
+        are deserialized the first time the contract is accessed. The
+        content hash covers the contracts of the index, their addresses
+        included, and the functions.
+
+        The file stays mapped until close is called, or the snapshot is
+        used as a context manager.
+    '''
+    MAGIC = b'ALASTRIA-IDENTITY-CONFIG'
+    VERSION = 2
+
+    def __init__(self, index: dict, snapshot: mmap.mmap, body_offset: int):
+        self.index = index
+        self.snapshot = snapshot
+        self.body_offset = body_offset
+        self._contracts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def write(cls, config: Mapping, path: str) -> None:
+        contracts_index = {}
+        body = bytearray()
+
+        for name, contract in config.items():
+            functions = json.dumps(
+                contract['functions'], separators=(',', ':')).encode('utf-8')
+            contracts_index[name] = {
+                'address': contract['address'],
+                'offset': len(body),
+                'length': len(functions)
+            }
+            body += functions
+
+        index = json.dumps({
+            'version': cls.VERSION,
+            'content_hash': cls.get_content_hash(contracts_index, body),
+            'contracts': contracts_index
+        }).encode('utf-8')
+
+        directory = os.path.dirname(os.path.abspath(path))
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as snapshot_file:
+                snapshot_file.write(cls.MAGIC + b'\n' + index + b'\n' + body)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str, verify: bool = True) -> 'ConfigSnapshot':
+        with open(path, 'rb') as snapshot_file:
+            if snapshot_file.readline().rstrip(b'\n') != cls.MAGIC:
+                raise InvalidSnapshotError(f'{path} is not a config snapshot')
+
+            try:
+                index = json.loads(snapshot_file.readline())
+            except ValueError as error:
+                raise InvalidSnapshotError(f'{path} has an invalid index') from error
+
+            if index.get('version') != cls.VERSION:
+                raise InvalidSnapshotError(
+                    f'Snapshot version {index.get("version")} is not supported')
+
+            body_offset = snapshot_file.tell()
+            # The mapping stays valid once the file is closed
+            snapshot = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if verify:
+            with memoryview(snapshot) as view:
+                content_hash = cls.get_content_hash(index['contracts'], view[body_offset:])
+
+            if content_hash != index['content_hash']:
+                snapshot.close()
+                raise InvalidSnapshotError(f'{path} content does not match its hash')
+
+        return cls(index['contracts'], snapshot, body_offset)
+
+    @staticmethod
+    def get_content_hash(contracts_index: dict, body) -> str:
+        content_hash = hashlib.sha256(json.dumps(
+            contracts_index, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+        content_hash.update(body)
+        return content_hash.hexdigest()
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+    def __enter__(self) -> 'ConfigSnapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __getitem__(self, name: str) -> dict:
+        contract = self._contracts.get(name)
+
+        if contract is None:
+            entry = self.index[name]
+
+            with self._lock:
+                contract = self._contracts.get(name)
+
+                if contract is None:
+                    start = self.body_offset + entry['offset']
+                    contract = self._contracts[name] = {
+                        'functions': json.loads(
+                            self.snapshot[start:start + entry['length']]),
+                        'address': entry['address']
+                    }
+
+        return contract
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
@@ -1,18 +1,82 @@
+import threading
+
 from web3 import Web3
 from web3.contract import Contract
 
 from alastria_identity.exceptions import ContractNameError
+from .key_cache import KeyCache
+from .abi_encoder import AbiEncoder
 
 
 class ContractsService:
+    '''
+        Contract handlers are built once per (contract name, endpoint) and
+        encoders once per contract, both are shared between threads. They
+        are dropped when the version of the config changes (see LiveConfig),
+        a plain dict is assumed to never change once it is given to the
+        service.
+
+        Use ContractsService.for_config to share the handlers of a config
+        between every service built from it.
+    '''
+    registry = KeyCache(maxsize=16)
+
     def __init__(self, config):
         self.config = config
+        self._handlers = {}
+        self._encoders = {}
+        self._version = getattr(config, 'version', None)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, config) -> 'ContractsService':
+        # Cached services keep their config alive, so its id can't be
+        # reused by another config while the entry exists
+        service = cls.registry.get(id(config))
+
+        if service is None or service.config is not config:
+            service = cls(config)
+            cls.registry.set(id(config), service)
+
+        return service
 
     def get_contract_handler(
         self, contract_name: str, endpoint: Web3
     ) -> Contract:
-        return endpoint.eth.contract(
-            abi=self.get_abi_by_contract_name(contract_name))
+        key = (contract_name, id(endpoint))
+
+        with self._lock:
+            self.check_version()
+            entry = self._handlers.get(key)
+
+            if entry is None:
+                # The endpoint is kept with its handler for the same reason
+                # the registry keeps the config
+                entry = self._handlers[key] = (
+                    endpoint,
+                    endpoint.eth.contract(
+                        abi=self.get_abi_by_contract_name(contract_name)))
+
+        return entry[1]
+
+    def get_encoder(self, contract_name: str) -> AbiEncoder:
+        with self._lock:
+            self.check_version()
+            encoder = self._encoders.get(contract_name)
+
+            if encoder is None:
+                encoder = self._encoders[contract_name] = AbiEncoder(
+                    self.get_abi_by_contract_name(contract_name))
+
+        return encoder
+
+    def check_version(self) -> None:
+        version = getattr(self.config, 'version', None)
+
+        if version != self._version:
+            self._handlers.clear()
+            self._encoders.clear()
+            self._version = version
 
     def get_abi_by_contract_name(self, contract_name: str) -> list:
         try:
@@ -0,0 +1,124 @@
+import json
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwcrypto import jwk, jws
+from jwcrypto.common import base64url_encode, base64url_decode, json_encode
+from ecdsa.curves import SECP256k1
+from ecdsa.util import sigencode_der
+
+from alastria_identity.types import CryptoBackend, DecodedJwt
+from alastria_identity.exceptions import InvalidTokenError
+
+try:
+    import coincurve
+except ImportError:  # pragma: no cover
+    coincurve = None
+
+ALGORITHM = 'ES256K'
+
+
+class JwcryptoBackend(CryptoBackend):
+    '''
+        Signing and verification through jwcrypto. Keys are built straight
+        from the raw scalar or point with cryptography, there is no PEM
+        encoding and parsing in between.
+    '''
+    name = 'jwcrypto'
+
+    def load_signing_key(self, private_key: bytes) -> jwk.JWK:
+        key = ec.derive_private_key(
+            int.from_bytes(private_key, 'big'), ec.SECP256K1(), default_backend())
+        return jwk.JWK.from_pyca(key)
+
+    def dump_signing_key(self, signing_key: jwk.JWK) -> bytes:
+        private_key = json.loads(signing_key.export_private())['d']
+        return base64url_decode(private_key).rjust(32, b'\x00')
+
+    def load_verifying_key(self, public_key: bytes) -> jwk.JWK:
+        if len(public_key) == 64:
+            public_key = b'\x04' + public_key
+        key = ec.EllipticCurvePublicKey.from_encoded_point(
+            ec.SECP256K1(), public_key)
+        return jwk.JWK.from_pyca(key)
+
+    def sign(self, signing_key: jwk.JWK, header: dict, payload: dict) -> str:
+        token = jws.JWS(json_encode(payload))
+        token.allowed_algs = [ALGORITHM]
+        token.add_signature(signing_key, protected=json_encode(header))
+        return token.serialize(compact=True)
+
+    def verify(self, verifying_key: jwk.JWK, jwt_data: str) -> bool:
+        try:
+            jws_token = jws.JWS(jwt_data)
+            jws_token.deserialize(jwt_data)
+            jws_token.allowed_algs.extend([ALGORITHM])
+            jws_token.verify(verifying_key, alg=ALGORITHM)
+            return True
+        except jws.InvalidJWSSignature:
+            return False
+
+
+class CoincurveBackend(CryptoBackend):
+    '''
+        Native libsecp256k1 through coincurve. Builds the JWS compact
+        serialization itself with the same header and payload encoding
+        jwcrypto uses.
+    '''
+    name = 'coincurve'
+
+    def __init__(self):
+        if coincurve is None:
+            raise ImportError('coincurve is required to use CoincurveBackend')
+
+    def load_signing_key(self, private_key: bytes) -> 'coincurve.PrivateKey':
+        return coincurve.PrivateKey(private_key)
+
+    def dump_signing_key(self, signing_key: 'coincurve.PrivateKey') -> bytes:
+        return signing_key.secret
+
+    def load_verifying_key(self, public_key: bytes) -> 'coincurve.PublicKey':
+        if len(public_key) == 64:
+            public_key = b'\x04' + public_key
+        return coincurve.PublicKey(public_key)
+
+    def sign(self, signing_key: 'coincurve.PrivateKey', header: dict, payload: dict) -> str:
+        signing_input = '.'.join([
+            base64url_encode(json_encode(header)),
+            base64url_encode(json_encode(payload))
+        ])
+        # The recoverable signature is r || s || v with a low s, JWS wants
+        # r || s. coincurve hashes with sha256 by default as ES256K needs
+        signature = signing_key.sign_recoverable(
+            signing_input.encode('utf-8'))[:64]
+        return f'{signing_input}.{base64url_encode(signature)}'
+
+    def verify(self, verifying_key: 'coincurve.PublicKey', jwt_data: str) -> bool:
+        try:
+            token = DecodedJwt(jwt_data)
+            algorithm = token.header.get('alg')
+            signature = token.signature
+        except InvalidTokenError as error:
+            raise jws.InvalidJWSObject('Invalid format', error)
+
+        if algorithm != ALGORITHM or len(signature) != 64:
+            return False
+
+        try:
+            return verifying_key.verify(
+                self.to_low_s_der(signature), token.signing_input)
+        except ValueError:
+            return False
+
+    @staticmethod
+    def to_low_s_der(signature: bytes) -> bytes:
+        # libsecp256k1 only accepts low s signatures, other implementations
+        # (like jwcrypto) produce both so we normalise before checking
+        order = SECP256k1.order
+        r = int.from_bytes(signature[:32], 'big')
+        s = int.from_bytes(signature[32:], 'big')
+
+        if s > order // 2:
+            s = order - s
+
+        return sigencode_der(r, s, order)
@@ -0,0 +1,72 @@
+import os
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+
+SERIAL_EXECUTOR = 'serial'
+THREAD_EXECUTOR = 'thread'
+PROCESS_EXECUTOR = 'process'
+EXECUTORS = (SERIAL_EXECUTOR, THREAD_EXECUTOR, PROCESS_EXECUTOR)
+DEFAULT_CHUNK_SIZE = 256
+
+
+def chunked(items: Iterable, chunk_size: int) -> Iterator[List]:
+    iterator = iter(items)
+    chunk = list(islice(iterator, chunk_size))
+
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def map_chunks(
+    function: Callable[[List], List],
+    items: Iterable,
+    executor: str = SERIAL_EXECUTOR,
+    max_workers: int = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_in_flight: int = None,
+    initializer: Callable = None,
+    initargs: tuple = ()
+) -> Iterator:
+    '''
+        Applies function to consecutive chunks of items and yields every
+        item of the returned lists in input order. Only max_in_flight chunks
+        (twice the number of workers by default) are submitted at once, so
+        the input can be an arbitrarily long iterator. For the process
+        executor the function and its chunks must be picklable.
+    '''
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f'Unknown executor {executor}, use one of {", ".join(EXECUTORS)}')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be greater than 0')
+
+    chunks = chunked(items, chunk_size)
+
+    if executor == SERIAL_EXECUTOR:
+        for chunk in chunks:
+            yield from function(chunk)
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or max_workers * 2
+    pool_class = ThreadPoolExecutor if executor == THREAD_EXECUTOR else ProcessPoolExecutor
+    pending = deque()
+
+    with pool_class(
+        max_workers=max_workers, initializer=initializer, initargs=initargs
+    ) as pool:
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(function, chunk))
+
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,131 @@
+import os
+import json
+import math
+import time
+import hashlib
+import tempfile
+from dataclasses import dataclass
+
+import requests
+
+from alastria_identity.exceptions import CacheMissError
+from .http_session import get_default_session
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    status_code: int = 200
+    from_cache: bool = True
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class HttpCache:
+    '''
+        Keeps every fetched document in directory with its ETag and
+        Last-Modified values and revalidates it with If-None-Match and
+        If-Modified-Since, so a warm start only costs 304 responses.
+
+        :param directory: Where documents are stored, created if needed
+        :param stale_if_error: Seconds since the last successful validation
+        during which a cached copy is served if the upstream is unreachable
+        or fails with a 5xx, 0 disables it
+        :param offline: Serve cached copies without any request
+    '''
+
+    def __init__(
+        self, directory: str, stale_if_error: float = math.inf,
+        offline: bool = False
+    ):
+        self.directory = directory
+        self.stale_if_error = stale_if_error
+        self.offline = offline
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, url: str, timeout: float = None, session: requests.Session = None):
+        entry = self.load(url)
+
+        if self.offline:
+            if entry is None:
+                raise CacheMissError(f'{url} is not cached and the cache is offline')
+            return CachedResponse(entry['content'])
+
+        try:
+            response = (session or get_default_session()).get(
+                url, headers=self.get_conditional_headers(entry), timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if not self.can_serve_stale(entry):
+                raise
+            return CachedResponse(entry['content'])
+
+        if response.status_code == 304 and entry is not None:
+            self.store_metadata(url, entry['etag'], entry['last_modified'])
+            return CachedResponse(entry['content'])
+        if response.status_code >= 500 and self.can_serve_stale(entry):
+            return CachedResponse(entry['content'])
+
+        response.raise_for_status()
+        self.store(
+            url, response.content,
+            response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response
+
+    def get_conditional_headers(self, entry: dict) -> dict:
+        headers = {}
+
+        if entry is None:
+            return headers
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        return headers
+
+    def can_serve_stale(self, entry: dict) -> bool:
+        return entry is not None and time.time() - entry['validated_at'] <= self.stale_if_error
+
+    def get_path(self, url: str) -> str:
+        return os.path.join(
+            self.directory, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def load(self, url: str) -> dict:
+        path = self.get_path(url)
+
+        try:
+            with open(f'{path}.json') as metadata_file:
+                metadata = json.load(metadata_file)
+            with open(f'{path}.body', 'rb') as content_file:
+                metadata['content'] = content_file.read()
+        except (OSError, ValueError):
+            return None
+
+        return metadata
+
+    def store(self, url: str, content: bytes, etag: str, last_modified: str) -> None:
+        # Body first, a reader never finds metadata pointing to a missing body
+        self.write_atomically(f'{self.get_path(url)}.body', content)
+        self.store_metadata(url, etag, last_modified)
+
+    def store_metadata(self, url: str, etag: str, last_modified: str) -> None:
+        metadata = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'validated_at': time.time()
+        }
+        self.write_atomically(
+            f'{self.get_path(url)}.json', json.dumps(metadata).encode('utf-8'))
+
+    def write_atomically(self, path: str, content: bytes) -> None:
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                temporary_file.write(content)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
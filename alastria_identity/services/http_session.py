@@ -0,0 +1,49 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def build_session(
+    pool_size: int = DEFAULT_POOL_SIZE,
+    retries: int = DEFAULT_RETRIES,
+    backoff_factor: float = DEFAULT_BACKOFF_FACTOR
+) -> requests.Session:
+    '''
+        Session keeping up to pool_size connections alive per host and
+        retrying failed connections and 5xx responses with exponential
+        backoff. Once retries are exhausted the last response is returned
+        so callers can still inspect it.
+    '''
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_default_session() -> requests.Session:
+    # Shared by every build in the process so connections are reused
+    # between repeated config builds too
+    global _default_session
+
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = build_session()
+        return _default_session
@@ -1,13 +1,24 @@
-from typing import List
+from typing import Deque, Iterable, Iterator, List, Tuple
+from collections import deque
 from dataclasses import asdict
+from eth_account import Account
 from eth_account.account import SignedTransaction, HexBytes
 
 from alastria_identity.types import UserIdentity, Transaction, DEFAULT_NONCE
+from .nonce_manager import NonceManager
+from .executors import (
+    SERIAL_EXECUTOR, PROCESS_EXECUTOR, DEFAULT_CHUNK_SIZE, map_chunks)
 
 
 class UserIdentityService:
-    def __init__(self, identity: UserIdentity):
+    def __init__(self, identity: UserIdentity, nonce_manager: NonceManager = None):
+        '''
+            Without a nonce_manager the nonce of every transaction is
+            fetched from the node, share one NonceManager between the
+            services signing for the same addresses to count them locally.
+        '''
         self.identity = identity
+        self.nonce_manager = nonce_manager
 
     def add_transaction(self, transaction: Transaction) -> None:
         self.identity.transactions.append(transaction)
@@ -15,12 +26,114 @@ class UserIdentityService:
     def get_signed_transactions(self) -> List:
         return map(self.sign_transaction, self.identity.transactions)
 
+    def sign_transactions(
+        self,
+        transactions: Iterable[Transaction] = None,
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int = None
+    ) -> Iterator[HexBytes]:
+        '''
+            Signs transactions, the identity transactions by default, and
+            yields the raw transactions in input order. Transactions without
+            a nonce get consecutive ones as they are read, so the output is
+            in nonce order; the pending count is fetched once when there is
+            no nonce_manager.
+
+            transactions can be any iterable, only max_in_flight chunks are
+            held at a time. Process workers load the private key once when
+            they start.
+
+            Nonces are assigned as transactions are read, ahead of the
+            yielded ones. When the output is closed before the end or a
+            chunk fails, the nonces of the transactions read but not
+            yielded are given back. If the shared nonce_manager handed out
+            a later nonce meanwhile they can't be, call reconcile once the
+            yielded transactions are sent.
+        '''
+        if transactions is None:
+            transactions = self.identity.transactions
+
+        nonce_manager = self.nonce_manager or NonceManager(self.identity.endpoint)
+        unsigned = deque()
+        raw_transactions = self.map_signing_chunks(
+            self.assign_nonces(transactions, nonce_manager, unsigned), executor,
+            max_workers, chunk_size, max_in_flight)
+
+        return self.release_unsigned(raw_transactions, nonce_manager, unsigned)
+
+    def map_signing_chunks(
+        self,
+        transactions: Iterable[Transaction],
+        executor: str,
+        max_workers: int,
+        chunk_size: int,
+        max_in_flight: int
+    ) -> Iterator[HexBytes]:
+        if executor == PROCESS_EXECUTOR:
+            return map_chunks(
+                sign_transactions_chunk, transactions, executor=executor,
+                max_workers=max_workers, chunk_size=chunk_size,
+                max_in_flight=max_in_flight,
+                initializer=init_transaction_signing_worker,
+                initargs=(self.identity.private_key,))
+
+        return map_chunks(
+            self.sign_transactions_chunk, transactions, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size,
+            max_in_flight=max_in_flight)
+
+    def sign_transactions_chunk(self, chunk: List[Transaction]) -> List[HexBytes]:
+        return [self.sign_transaction(transaction) for transaction in chunk]
+
+    def assign_nonces(
+        self,
+        transactions: Iterable[Transaction],
+        nonce_manager: NonceManager,
+        unsigned: Deque[Tuple[Transaction, bool]]
+    ) -> Iterator[Transaction]:
+        '''
+            Every transaction read is queued in unsigned with whether its
+            nonce was assigned here
+        '''
+        for transaction in transactions:
+            assigned = transaction.nonce == DEFAULT_NONCE
+
+            if assigned:
+                transaction.nonce = nonce_manager.next_nonce(self.identity.address)
+            unsigned.append((transaction, assigned))
+            yield transaction
+
+    def release_unsigned(
+        self,
+        raw_transactions: Iterator[HexBytes],
+        nonce_manager: NonceManager,
+        unsigned: Deque[Tuple[Transaction, bool]]
+    ) -> Iterator[HexBytes]:
+        try:
+            for raw_transaction in raw_transactions:
+                unsigned.popleft()
+                yield raw_transaction
+        finally:
+            # Stops reading, and assigning nonces, before giving them back
+            raw_transactions.close()
+
+            for transaction, assigned in reversed(unsigned):
+                if not assigned:
+                    continue
+                if not nonce_manager.release(self.identity.address, transaction.nonce):
+                    break
+                transaction.nonce = DEFAULT_NONCE
+
     def get_signed_transaction_from_anonymous(self, transaction: Transaction) -> HexBytes:
         user_transaction = self.update_transaction_nonce(transaction)
         return self.sign_transaction(user_transaction)
 
     def update_transaction_nonce(self, transaction: Transaction) -> Transaction:
-        if transaction.nonce == DEFAULT_NONCE:
+        if transaction.nonce == DEFAULT_NONCE and self.nonce_manager is not None:
+            transaction.nonce = self.nonce_manager.next_nonce(self.identity.address)
+        elif transaction.nonce == DEFAULT_NONCE:
             transaction.nonce = self.identity.endpoint.eth.getTransactionCount(
                 self.identity.address)
         return transaction
@@ -29,3 +142,18 @@ class UserIdentityService:
         signed_transaction: SignedTransaction = self.identity.endpoint.eth.account.sign_transaction(
             asdict(transaction), self.identity.private_key)
         return signed_transaction.rawTransaction
+
+
+_worker_account = None
+
+
+def init_transaction_signing_worker(private_key: str) -> None:
+    global _worker_account
+    _worker_account = Account.from_key(private_key)
+
+
+def sign_transactions_chunk(chunk: List[Transaction]) -> List[HexBytes]:
+    return [
+        _worker_account.sign_transaction(asdict(transaction)).rawTransaction
+        for transaction in chunk
+    ]
@@ -0,0 +1,98 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class KeyCache:
+    """Bounded, thread-safe LRU cache for parsed key handles and other
+    values that are expensive to compute.
+
+    :param maxsize: Maximum number of entries kept, the least recently
+    used entry is evicted when it is exceeded
+    :param ttl: (Optional) Seconds an entry is considered fresh
+    """
+
+    DEFAULT_MAXSIZE = 1024
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError('maxsize must be greater than 0')
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or self.is_expired(entry):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, expires_at: float = None) -> None:
+        '''
+            expires_at is an optional UNIX timestamp after which the entry
+            is dropped even if the ttl has not elapsed yet
+        '''
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        sentinel = object()
+        value = self.get(key, sentinel)
+
+        if value is sentinel:
+            # Loading happens outside the lock so a slow parse does not
+            # block readers of other keys
+            value = loader()
+            self.set(key, value)
+
+        return value
+
+    def is_expired(self, entry: tuple) -> bool:
+        _, stored_at, expires_at = entry
+
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            return True
+        return expires_at is not None and time.time() > expires_at
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self.is_expired(entry)
@@ -0,0 +1,114 @@
+import threading
+from collections.abc import Mapping
+from typing import Callable, Tuple
+
+from alastria_identity.types import ConfigChanges
+
+
+class LiveConfig(Mapping):
+    '''
+        Config that can be replaced while it is being used, see
+        IdentityConfigBuilder.refresh. It can be given to ContractsService
+        and TransactionService instead of the generated config.
+
+        The version, the contracts and the url and address every contract
+        was built from are published together as one immutable state, so a
+        reader sees either the whole previous config or the whole new one.
+        Use snapshot() to read several contracts from the same version and
+        state() to read the version and sources along with them.
+    '''
+
+    def __init__(self, config: Mapping = None, sources: Mapping = None):
+        self._state = (0, dict(config or {}), dict(sources or {}))
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._state[0]
+
+    @property
+    def sources(self) -> dict:
+        return self._state[2]
+
+    def snapshot(self) -> dict:
+        return self._state[1]
+
+    def state(self) -> Tuple[int, dict, dict]:
+        '''
+            The version, contracts and sources of the same swap
+        '''
+        return self._state
+
+    def swap(self, config: Mapping, sources: Mapping) -> int:
+        with self._lock:
+            version = self._state[0] + 1
+            self._state = (version, dict(config), dict(sources))
+            return version
+
+    def __getitem__(self, name: str) -> dict:
+        return self._state[1][name]
+
+    def __iter__(self):
+        return iter(self._state[1])
+
+    def __len__(self) -> int:
+        return len(self._state[1])
+
+
+class ConfigRefresher:
+    '''
+        Refreshes a LiveConfig from a builder every interval seconds in a
+        daemon thread. Unchanged contracts are not fetched again, and with
+        an HttpCache ContractInfo.md only costs a revalidation.
+
+        on_change is called with the ConfigChanges of every refresh that
+        changed something. A failed refresh keeps the current config, its
+        exception is kept in last_error and given to on_error.
+    '''
+
+    def __init__(
+        self, builder, config: LiveConfig, interval: float = 60,
+        on_change: Callable[[ConfigChanges], None] = None,
+        on_error: Callable[[Exception], None] = None
+    ):
+        self.builder = builder
+        self.config = config
+        self.interval = interval
+        self.on_change = on_change
+        self.on_error = on_error
+        self.last_error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'ConfigRefresher':
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = None) -> None:
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.refresh()
+
+    def refresh(self) -> ConfigChanges:
+        try:
+            changes = self.builder.refresh(self.config)
+        except Exception as error:
+            self.last_error = error
+
+            if self.on_error is not None:
+                self.on_error(error)
+            return None
+
+        self.last_error = None
+
+        if changes and self.on_change is not None:
+            self.on_change(changes)
+
+        return changes
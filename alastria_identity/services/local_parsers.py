@@ -0,0 +1,115 @@
+import os
+import re
+import mmap
+import tarfile
+import zipfile
+import threading
+from typing import Dict
+
+from .parsers import ContractParser
+from .http_cache import CachedResponse
+
+
+class AbiBundle:
+    '''
+        ABIs laid out like the upstream repository, either in a directory or
+        in a zip or tar archive. Only the file names are indexed when the
+        bundle is opened, every file is read when its contract is parsed.
+
+        Files are found by their name (the last part of the url listed in
+        ContractInfo.md) or by their contract name, following the
+        sol_<Name>.abi convention.
+    '''
+    CONTRACT_NAME_REGEX = r'sol_(?P<name>.*)\.abi'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = None
+        self._lock = threading.Lock()
+
+        if os.path.isdir(path):
+            members = [
+                os.path.join(directory, file_name)
+                for directory, _, file_names in os.walk(path)
+                for file_name in file_names
+            ]
+        elif zipfile.is_zipfile(path):
+            self.archive = zipfile.ZipFile(path)
+            members = self.archive.namelist()
+        elif tarfile.is_tarfile(path):
+            self.archive = tarfile.open(path)
+            members = [member.name for member in self.archive.getmembers() if member.isfile()]
+        else:
+            raise ValueError(f'{path} is not a directory, zip or tar archive')
+
+        self.files = self.index_members(members)
+
+    def index_members(self, members: list) -> Dict[str, str]:
+        files = {}
+
+        for member in members:
+            file_name = os.path.basename(member)
+            files.setdefault(file_name, member)
+            match = re.search(self.CONTRACT_NAME_REGEX, file_name)
+
+            if match:
+                files.setdefault(match.group('name'), member)
+
+        return files
+
+    def read(self, name: str) -> bytes:
+        member = self.files.get(os.path.basename(name))
+
+        if member is None:
+            match = re.search(self.CONTRACT_NAME_REGEX, name)
+            member = self.files.get(match.group('name')) if match else None
+
+        if member is None:
+            raise FileNotFoundError(f'{name} is not in {self.path}')
+        if self.archive is None:
+            return read_mapped_file(member)
+
+        # Archive handles keep a file position, reads can't interleave
+        with self._lock:
+            if isinstance(self.archive, zipfile.ZipFile):
+                return self.archive.read(member)
+            return self.archive.extractfile(member).read()
+
+    def close(self) -> None:
+        if self.archive is not None:
+            self.archive.close()
+
+
+class LocalContractParser(ContractParser):
+    '''
+        ContractParser reading the ABI from an AbiBundle, or from the local
+        file at contract_url when no bundle is given, instead of over HTTP.
+
+        The timeout, cache and session options IdentityConfigBuilder gives
+        its parsers are accepted so a builder can switch parser class, but
+        they are ignored since nothing is fetched.
+    '''
+
+    def __init__(
+        self, contract_url: str, bundle: AbiBundle = None,
+        timeout=None, cache=None, session=None
+    ):
+        self.contract_url = contract_url
+        self.bundle = bundle
+        self.timeout = timeout
+        self.cache = cache
+        self.session = session
+
+    def get_json_data_from_url(self) -> CachedResponse:
+        if self.bundle is None:
+            return CachedResponse(read_mapped_file(self.contract_url))
+        return CachedResponse(self.bundle.read(self.contract_url))
+
+
+def read_mapped_file(path: str) -> bytes:
+    with open(path, 'rb') as abi_file:
+        if os.fstat(abi_file.fileno()).st_size == 0:
+            return b''
+
+        with mmap.mmap(abi_file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return content[:]
@@ -0,0 +1,84 @@
+import threading
+
+from web3 import Web3
+
+
+class NonceManager:
+    '''
+        Hands out the nonces of every address without asking the node each
+        time. The pending transaction count of an address is only fetched
+        for its first nonce, the next ones are counted locally under a
+        per address lock, so concurrent callers never get the same nonce.
+
+        When a transaction is rejected or dropped, release its nonce if it
+        was the last one handed out, otherwise call reconcile once the
+        transactions in flight are settled to restart from the node count
+        and fill the gap. TransactionSubmitter does both when it is given
+        the manager, reconciling once its sends in flight are settled.
+    '''
+    BLOCK_IDENTIFIER = 'pending'
+
+    def __init__(self, endpoint: Web3):
+        self.endpoint = endpoint
+        self._nonces = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def next_nonce(self, address: str) -> int:
+        return self.reserve(address, 1).start
+
+    def reserve(self, address: str, count: int) -> range:
+        '''
+            count consecutive nonces for address
+        '''
+        key = address.lower()
+
+        with self.get_lock(key):
+            nonce = self._nonces.get(key)
+
+            if nonce is None:
+                nonce = self.fetch_nonce(address)
+
+            self._nonces[key] = nonce + count
+            return range(nonce, nonce + count)
+
+    def release(self, address: str, nonce: int) -> bool:
+        '''
+            Takes back nonce if nothing was handed out after it, returns
+            whether it did
+        '''
+        key = address.lower()
+
+        with self.get_lock(key):
+            if self._nonces.get(key) != nonce + 1:
+                return False
+
+            self._nonces[key] = nonce
+            return True
+
+    def reconcile(self, address: str) -> int:
+        '''
+            Restarts address from the node pending count and returns it
+        '''
+        key = address.lower()
+
+        with self.get_lock(key):
+            nonce = self._nonces[key] = self.fetch_nonce(address)
+            return nonce
+
+    def reset(self, address: str = None) -> None:
+        '''
+            Forgets address, or every address, the next nonce is fetched
+        '''
+        keys = [address.lower()] if address is not None else list(self._nonces)
+
+        for key in keys:
+            with self.get_lock(key):
+                self._nonces.pop(key, None)
+
+    def fetch_nonce(self, address: str) -> int:
+        return self.endpoint.eth.getTransactionCount(address, self.BLOCK_IDENTIFIER)
+
+    def get_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
@@ -1,16 +1,18 @@
 import json
 
-import requests
-
 from alastria_identity.types import ConfigParser
+from .http_session import get_default_session
 
 
 class ContractParser(ConfigParser):
     DEFAULT_GITHUB_URL = 'https://github.com/'
     DEFAULT_GITHUB_RAW_URL = 'https://raw.githubusercontent.com/'
 
-    def __init__(self, contract_url):
+    def __init__(self, contract_url, timeout=None, cache=None, session=None):
         self.contract_url = contract_url
+        self.timeout = timeout
+        self.cache = cache
+        self.session = session or get_default_session()
 
     def parse(self):
         contract_response = self.get_json_data_from_url()
@@ -42,7 +44,11 @@ class ContractParser(ConfigParser):
             'blob/',
             ''
         )
-        contract_response = requests.get(contract_url)
+        if self.cache is not None:
+            return self.cache.get(
+                contract_url, timeout=self.timeout, session=self.session)
+
+        contract_response = self.session.get(contract_url, timeout=self.timeout)
         contract_response.raise_for_status()
 
         return contract_response
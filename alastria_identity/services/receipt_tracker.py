@@ -0,0 +1,230 @@
+import time
+import asyncio
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+from web3.exceptions import TimeExhausted
+
+
+class ReceiptTracker:
+    '''
+        Waits for the receipts of many transactions with a single polling
+        loop instead of one wait_for_transaction_receipt loop per hash.
+
+        The loop reads the block number every poll_interval seconds and
+        reads every new block once, with the hashes of its transactions.
+        Only the tracked transactions found in those blocks have their
+        receipt fetched, so the requests grow with the blocks and the
+        included transactions, not with the tracked ones. Transactions
+        tracked since the last poll may already be mined, their receipt is
+        fetched once. When a receipt is confirmations blocks deep, the hash
+        of its block is checked against the block now at that height: the
+        transaction is resolved if it matches, and its receipt is fetched
+        again otherwise, as a reorg moved or dropped it. A transaction not
+        resolved within timeout seconds fails with web3 TimeExhausted.
+
+        A failed poll is retried on the next interval so deadlines keep
+        firing, its exception is kept in last_error and given to on_error.
+        Receipts are the JSON-RPC results as the node sends them. The loop
+        stops when nothing is tracked and starts again with track.
+    '''
+    # Further behind, asking for every receipt is cheaper than the blocks
+    MAX_SCANNED_BLOCKS = 64
+
+    def __init__(
+        self, provider, confirmations: int = 1, poll_interval: float = 1.0,
+        timeout: float = 120, clock: Callable[[], float] = time.monotonic,
+        on_error: Callable[[Exception], None] = None
+    ):
+        if confirmations < 1:
+            raise ValueError('confirmations must be greater than 0')
+
+        self.provider = provider
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.on_error = on_error
+        self.last_error = None
+        self.head = None
+        self._pending: Dict[str, tuple] = {}
+        self._unchecked = set()
+        self._included: Dict[str, dict] = {}
+        self._task = None
+
+    def track(
+        self, transaction_hash: Union[str, bytes], timeout: float = None,
+        callback: Callable[[asyncio.Future], None] = None
+    ) -> 'asyncio.Future[dict]':
+        '''
+            Future resolved with the receipt of transaction_hash, callback
+            is called with the future once it is done
+        '''
+        transaction_hash = normalize_hash(transaction_hash)
+        entry = self._pending.get(transaction_hash)
+
+        if entry is None:
+            deadline = self.clock() + (self.timeout if timeout is None else timeout)
+            entry = self._pending[transaction_hash] = (
+                asyncio.get_running_loop().create_future(), deadline)
+            self._unchecked.add(transaction_hash)
+
+        if callback is not None:
+            entry[0].add_done_callback(callback)
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+
+        return entry[0]
+
+    async def wait(self, transaction_hashes: Iterable[Union[str, bytes]]) -> List[dict]:
+        return await asyncio.gather(*map(self.track, transaction_hashes))
+
+    async def run(self) -> None:
+        while self._pending:
+            try:
+                await self.poll()
+            except Exception as error:
+                # A broken response must not stop the loop, or no pending
+                # transaction would ever time out
+                self.last_error = error
+
+                if self.on_error is not None:
+                    self.on_error(error)
+            else:
+                self.last_error = None
+
+            if self._pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def poll(self) -> None:
+        self.expire()
+        head = await self.request('eth_blockNumber', [])
+
+        if head is None:
+            return
+
+        head, blocks = await self.get_new_blocks(int(head, 16))
+        included = {
+            normalize_hash(transaction_hash)
+            for block in blocks.values()
+            for transaction_hash in block.get('transactions', [])
+        }
+        transaction_hashes = [
+            transaction_hash for transaction_hash in self._pending
+            if transaction_hash in self._unchecked or transaction_hash in included
+        ]
+        receipts = await asyncio.gather(*(
+            self.request('eth_getTransactionReceipt', [transaction_hash])
+            for transaction_hash in transaction_hashes
+        ))
+        # Only once every receipt arrived, a failed poll is done again
+        self.head = head
+        self._unchecked.difference_update(transaction_hashes)
+
+        for transaction_hash, receipt in zip(transaction_hashes, receipts):
+            if transaction_hash not in self._pending:
+                continue
+            if receipt and receipt.get('blockNumber') is not None:
+                self._included[transaction_hash] = receipt
+            else:
+                self._included.pop(transaction_hash, None)
+
+        await self.confirm(blocks)
+
+    async def get_new_blocks(self, head: int) -> Tuple[int, Dict[int, dict]]:
+        '''
+            The blocks mined since the last poll by number, up to the first
+            one the node can't give yet, and the last of them
+        '''
+        if self.head is None:
+            return head, {}
+        if head <= self.head:
+            # Behind a load balancer the head may go back for a while
+            return self.head, {}
+        if head - self.head > self.MAX_SCANNED_BLOCKS:
+            self._unchecked.update(self._pending)
+            return head, {}
+
+        numbers = range(self.head + 1, head + 1)
+        blocks = {}
+
+        for number, block in zip(numbers, await asyncio.gather(*map(self.get_block, numbers))):
+            if block is None:
+                break
+            blocks[number] = block
+
+        return self.head + len(blocks), blocks
+
+    async def confirm(self, blocks: Dict[int, dict]) -> None:
+        deep = {
+            transaction_hash: receipt
+            for transaction_hash, receipt in self._included.items()
+            if self.head - int(receipt['blockNumber'], 16) + 1 >= self.confirmations
+        }
+        numbers = {int(receipt['blockNumber'], 16) for receipt in deep.values()}
+        missing = [number for number in numbers if number not in blocks]
+        blocks = {**blocks, **dict(zip(
+            missing, await asyncio.gather(*map(self.get_block, missing))))}
+
+        for transaction_hash, receipt in deep.items():
+            block = blocks[int(receipt['blockNumber'], 16)]
+
+            if block is not None and block.get('hash') == receipt.get('blockHash'):
+                self.resolve(transaction_hash, receipt)
+            else:
+                # Replaced by a reorg, where the transaction is now is asked
+                # on the next poll
+                del self._included[transaction_hash]
+                self._unchecked.add(transaction_hash)
+
+    def expire(self) -> None:
+        now = self.clock()
+
+        for transaction_hash, (future, deadline) in list(self._pending.items()):
+            # Futures cancelled by their waiter are dropped too
+            if now >= deadline or future.done():
+                self.discard(transaction_hash)
+
+                if not future.done():
+                    future.set_exception(TimeExhausted(
+                        f'Transaction {transaction_hash} was not confirmed in time'))
+
+    def resolve(self, transaction_hash: str, receipt: dict) -> None:
+        future, _ = self._pending[transaction_hash]
+        self.discard(transaction_hash)
+
+        if not future.done():
+            future.set_result(receipt)
+
+    def discard(self, transaction_hash: str) -> None:
+        del self._pending[transaction_hash]
+        self._unchecked.discard(transaction_hash)
+        self._included.pop(transaction_hash, None)
+
+    async def get_block(self, number: int) -> dict:
+        return await self.request('eth_getBlockByNumber', [hex(number), False])
+
+    async def request(self, method: str, params: list):
+        # A failed request is retried on the next poll like a missing result
+        response = await self.provider.make_request(method, params)
+        return response.get('result')
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        for future, _ in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._unchecked.clear()
+        self._included.clear()
+
+
+def normalize_hash(transaction_hash: Union[str, bytes]) -> str:
+    if isinstance(transaction_hash, str):
+        return '0x' + transaction_hash.lower().replace('0x', '', 1)
+    return '0x' + bytes(transaction_hash).hex()
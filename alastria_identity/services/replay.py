@@ -0,0 +1,209 @@
+import time
+import heapq
+import sqlite3
+import threading
+from typing import Callable
+
+from alastria_identity.types import ReplayIndex
+
+
+class JtiReplayIndex(ReplayIndex):
+    '''
+        In-process index of the jti values already seen. Every jti is kept
+        until its token expires, entries are grouped in buckets of
+        bucket_seconds by expiration so expired ones are dropped a whole
+        bucket at a time.
+
+        When max_entries is reached the index fails open by default: the
+        entries closest to their expiration are evicted to make room, so
+        their tokens could be replayed before they expire. With
+        reject_when_full it fails closed instead and every new jti is
+        refused until expired entries free some room.
+    '''
+    DEFAULT_MAX_ENTRIES = 100000
+    DEFAULT_BUCKET_SECONDS = 60
+    DEFAULT_TTL = 3600
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+        default_ttl: int = DEFAULT_TTL,
+        reject_when_full: bool = False,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_entries = max_entries
+        self.bucket_seconds = bucket_seconds
+        self.default_ttl = default_ttl
+        self.reject_when_full = reject_when_full
+        self.clock = clock
+        self.evictions = 0
+        self.rejections = 0
+        self._expirations = {}
+        self._buckets = {}
+        self._bucket_heap = []
+        self._lock = threading.Lock()
+
+    def check_and_add(self, jti: str, exp: float = None) -> bool:
+        '''
+            Returns True the first time a jti is seen before it expires and
+            False when it is a replay or, with reject_when_full, when the
+            index is full.
+        '''
+        now = self.clock()
+        exp = exp or now + self.default_ttl
+
+        with self._lock:
+            self.purge(now)
+
+            if self.is_seen(jti, now):
+                return False
+
+            if len(self._expirations) >= self.max_entries and self.reject_when_full:
+                self.rejections += 1
+                return False
+
+            # Evicting before adding keeps the new jti out of the way
+            while len(self._expirations) >= self.max_entries:
+                self.evict_one()
+
+            self.add(jti, exp)
+            return True
+
+    def __contains__(self, jti: str) -> bool:
+        with self._lock:
+            return self.is_seen(jti, self.clock())
+
+    def __len__(self) -> int:
+        return len(self._expirations)
+
+    def is_seen(self, jti: str, now: float) -> bool:
+        exp = self._expirations.get(jti)
+
+        if exp is None:
+            return False
+        if exp < now:
+            # Expired but its bucket is still current
+            self.remove(jti)
+            return False
+
+        return True
+
+    def add(self, jti: str, exp: float) -> None:
+        bucket_id = int(exp // self.bucket_seconds)
+        bucket = self._buckets.get(bucket_id)
+
+        if bucket is None:
+            bucket = self._buckets[bucket_id] = set()
+            heapq.heappush(self._bucket_heap, bucket_id)
+
+        bucket.add(jti)
+        self._expirations[jti] = exp
+
+    def remove(self, jti: str) -> None:
+        exp = self._expirations.pop(jti)
+        self._buckets[int(exp // self.bucket_seconds)].discard(jti)
+
+    def purge(self, now: float) -> None:
+        current_bucket_id = int(now // self.bucket_seconds)
+
+        while self._bucket_heap and self._bucket_heap[0] < current_bucket_id:
+            bucket_id = heapq.heappop(self._bucket_heap)
+
+            for jti in self._buckets.pop(bucket_id):
+                del self._expirations[jti]
+
+    def evict_one(self) -> None:
+        while not self._buckets[self._bucket_heap[0]]:
+            del self._buckets[heapq.heappop(self._bucket_heap)]
+
+        jti = self._buckets[self._bucket_heap[0]].pop()
+        del self._expirations[jti]
+        self.evictions += 1
+
+
+class SqliteReplayIndex(ReplayIndex):
+    '''
+        Replay index stored in a SQLite file so every worker process on the
+        same host shares it. Expired entries are purged every purge_every
+        inserts, which is also when max_entries is enforced.
+    '''
+    DEFAULT_MAX_ENTRIES = 1000000
+    DEFAULT_TTL = 3600
+    DEFAULT_PURGE_EVERY = 1000
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        default_ttl: int = DEFAULT_TTL,
+        purge_every: int = DEFAULT_PURGE_EVERY,
+        timeout: float = 5.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.purge_every = purge_every
+        self.timeout = timeout
+        self.clock = clock
+        self._inserts = 0
+        self._local = threading.local()
+
+        with self.connection as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS jti (jti TEXT PRIMARY KEY, exp REAL NOT NULL)')
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS jti_exp ON jti (exp)')
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+
+        return connection
+
+    def check_and_add(self, jti: str, exp: float = None) -> bool:
+        now = self.clock()
+        exp = exp or now + self.default_ttl
+
+        with self.connection as connection:
+            connection.execute(
+                'DELETE FROM jti WHERE jti = ? AND exp < ?', (jti, now))
+            is_new = connection.execute(
+                'INSERT OR IGNORE INTO jti (jti, exp) VALUES (?, ?)',
+                (jti, exp)).rowcount == 1
+
+        if is_new:
+            self._inserts += 1
+            if self._inserts % self.purge_every == 0:
+                self.purge(now)
+
+        return is_new
+
+    def __contains__(self, jti: str) -> bool:
+        row = self.connection.execute(
+            'SELECT 1 FROM jti WHERE jti = ? AND exp >= ?',
+            (jti, self.clock())).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM jti').fetchone()[0]
+
+    def purge(self, now: float = None) -> None:
+        now = self.clock() if now is None else now
+
+        with self.connection as connection:
+            connection.execute('DELETE FROM jti WHERE exp < ?', (now,))
+            excess = connection.execute(
+                'SELECT COUNT(*) FROM jti').fetchone()[0] - self.max_entries
+
+            if excess > 0:
+                connection.execute(
+                    'DELETE FROM jti WHERE jti IN '
+                    '(SELECT jti FROM jti ORDER BY exp LIMIT ?)', (excess,))
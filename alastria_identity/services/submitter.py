@@ -0,0 +1,201 @@
+import asyncio
+from typing import Any, Collection, Iterable, List
+
+import rlp
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from alastria_identity.exceptions import TransactionSubmissionError
+from .calldata_decoder import get_transaction_nonce
+from .nonce_manager import NonceManager
+
+try:
+    from aiohttp import ClientError
+except ImportError:  # pragma: no cover
+    ClientError = OSError
+
+TRANSIENT_ERRORS = (OSError, asyncio.TimeoutError, ClientError)
+
+
+class TransactionSubmitter:
+    '''
+        Sends signed raw transactions with eth_sendRawTransaction through an
+        async provider, such as web3 AsyncHTTPProvider or anything with the
+        same make_request coroutine.
+
+        At most max_in_flight transactions are being sent at a time, submit
+        waits for a free slot before scheduling the next one, so a producer
+        awaiting it can't run ahead of the node. Connection errors,
+        timeouts and the JSON-RPC errors of retryable_codes or containing
+        one of retryable_messages, such as rate limits, are retried with
+        exponential backoff. A transaction the node already knows counts as
+        sent and any other JSON-RPC error raises TransactionSubmissionError.
+
+        With the nonce_manager that signed the transactions of address, a
+        rejected transaction gives its nonce back when it was the last one
+        handed out. When it was not, or when the node does not accept a
+        nonce, address is marked stale and restarted from the node pending
+        count once every transaction in flight is settled, as the count
+        does not include transactions the node has not received yet. The
+        next submit or join waits for that before going on.
+    '''
+    ALREADY_KNOWN_MESSAGES = ('already known', 'known transaction')
+    NONCE_ERROR_MESSAGES = ('nonce too low', 'nonce too high', 'invalid nonce')
+    # -32005 is the limit exceeded code of EIP-1474
+    RETRYABLE_ERROR_CODES = frozenset({-32005})
+    RETRYABLE_ERROR_MESSAGES = ('header not found', 'rate limit', 'too many requests')
+
+    def __init__(
+        self, provider, max_in_flight: int = 16, retries: int = 3,
+        backoff_factor: float = 0.2, nonce_manager: NonceManager = None,
+        address: str = None, retryable_codes: Collection[int] = RETRYABLE_ERROR_CODES,
+        retryable_messages: Collection[str] = RETRYABLE_ERROR_MESSAGES
+    ):
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be greater than 0')
+        if (nonce_manager is None) != (address is None):
+            raise ValueError('nonce_manager and address go together')
+
+        self.provider = provider
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.nonce_manager = nonce_manager
+        self.address = address
+        self.retryable_codes = retryable_codes
+        self.retryable_messages = [message.lower() for message in retryable_messages]
+        self._semaphore = None
+        self._reconcile_lock = None
+        self._pending = set()
+        self._stale = False
+
+    async def submit(self, raw_transaction: bytes) -> 'asyncio.Future[HexBytes]':
+        '''
+            Waits for a free slot and returns the task sending
+            raw_transaction, awaiting it gives the transaction hash
+        '''
+        if self._semaphore is None:
+            # Created here so they belong to the running loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._reconcile_lock = asyncio.Lock()
+
+        await self._semaphore.acquire()
+
+        if self._stale:
+            try:
+                await self.reconcile()
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+        task = asyncio.ensure_future(self.send(raw_transaction))
+        self._pending.add(task)
+        task.add_done_callback(self.release)
+        return task
+
+    async def submit_all(self, raw_transactions: Iterable[bytes]) -> List[HexBytes]:
+        '''
+            Submits every transaction in order and returns their hashes,
+            the first failure is raised once every transaction is settled
+        '''
+        tasks = [await self.submit(raw_transaction) for raw_transaction in raw_transactions]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await self.join()
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return results
+
+    async def join(self) -> None:
+        if self._pending:
+            await asyncio.wait(set(self._pending))
+        if self._stale:
+            await self.reconcile()
+
+    async def reconcile(self) -> None:
+        '''
+            Waits for the transactions in flight and restarts address from
+            the node pending count if it is stale
+        '''
+        async with self._reconcile_lock:
+            if self._pending:
+                await asyncio.wait(set(self._pending))
+            if not self._stale:
+                return
+
+            # The node pending count is fetched with a blocking request
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.nonce_manager.reconcile, self.address)
+            self._stale = False
+
+    async def send(self, raw_transaction: bytes) -> HexBytes:
+        raw_transaction = HexBytes(raw_transaction)
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.provider.make_request(
+                    'eth_sendRawTransaction', ['0x' + bytes(raw_transaction).hex()])
+            except TRANSIENT_ERRORS:
+                if attempt == self.retries:
+                    raise
+            else:
+                if attempt == self.retries or not self.is_retryable(response):
+                    break
+
+            await asyncio.sleep(self.backoff_factor * 2 ** attempt)
+
+        try:
+            return self.get_transaction_hash(raw_transaction, response)
+        except TransactionSubmissionError as error:
+            if self.nonce_manager is not None:
+                self.recover_nonce(raw_transaction, str(error))
+            raise
+
+    def is_retryable(self, response: Any) -> bool:
+        error = response.get('error')
+
+        if error is None:
+            return False
+        if isinstance(error, dict) and error.get('code') in self.retryable_codes:
+            return True
+
+        message = get_error_message(error).lower()
+        return any(retryable in message for retryable in self.retryable_messages)
+
+    def get_transaction_hash(self, raw_transaction: HexBytes, response: Any) -> HexBytes:
+        error = response.get('error')
+
+        if error is None:
+            return HexBytes(response['result'])
+
+        message = get_error_message(error)
+
+        if any(known in message.lower() for known in self.ALREADY_KNOWN_MESSAGES):
+            return HexBytes(keccak(raw_transaction))
+
+        raise TransactionSubmissionError(message)
+
+    def recover_nonce(self, raw_transaction: HexBytes, message: str) -> None:
+        if any(nonce_error in message.lower() for nonce_error in self.NONCE_ERROR_MESSAGES):
+            self._stale = True
+            return
+
+        try:
+            nonce = get_transaction_nonce(bytes(raw_transaction))
+        except (rlp.DecodingError, ValueError, IndexError):
+            self._stale = True
+            return
+
+        # Later nonces would wait forever in the node queue behind the gap
+        if not self.nonce_manager.release(self.address, nonce):
+            self._stale = True
+
+    def release(self, task: asyncio.Future) -> None:
+        self._pending.discard(task)
+        self._semaphore.release()
+
+
+def get_error_message(error: Any) -> str:
+    return error.get('message', '') if isinstance(error, dict) else str(error)
@@ -1,15 +1,23 @@
 import base64
 import time
 import json
+import hashlib
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple
 from web3 import Web3
 from hexbytes import HexBytes
 
-from jwcrypto import jwk, jwt, jws
-from ecdsa.keys import SigningKey, VerifyingKey
-from ecdsa.curves import SECP256k1
+from jwcrypto import jws
 from eth_utils import decode_hex
+from Crypto.Hash import keccak
 
-from alastria_identity.types import (NetworkDid, JwtToken)
+from alastria_identity.types import (
+    NetworkDid, JwtToken, CryptoBackend, DecodedJwt)
+from alastria_identity.exceptions import InvalidTokenError
+from .key_cache import KeyCache
+from .crypto_backends import JwcryptoBackend
+from .executors import (
+    map_chunks, SERIAL_EXECUTOR, PROCESS_EXECUTOR, DEFAULT_CHUNK_SIZE)
 
 
 class TokenService:
@@ -17,15 +25,44 @@ class TokenService:
         'alg': 'ES256K',
         'typ': 'JWT'
     }
+    ALGORITHM = 'ES256K'
+    # Shared by every instance in the process unless one is given explicitly
+    verifying_key_cache = KeyCache()
+    signing_key_registry = KeyCache()
+    # signing_key is a jwcrypto JWK unless another backend, such as
+    # CoincurveBackend, is given or set here
+    backend = JwcryptoBackend()
+    verification_cache = None
+
+    def __init__(
+        self, private_key: str, verifying_key_cache: KeyCache = None,
+        backend: CryptoBackend = None, signing_key_registry: KeyCache = None,
+        verification_cache: KeyCache = None, cache_negative_results: bool = False
+    ):
+        self.cache_negative_results = cache_negative_results
+
+        if verification_cache is not None:
+            self.verification_cache = verification_cache
+        if verifying_key_cache is not None:
+            self.verifying_key_cache = verifying_key_cache
+        if signing_key_registry is not None:
+            self.signing_key_registry = signing_key_registry
+        if backend is not None:
+            self.backend = backend
 
-    def __init__(self, private_key: str):
         private_key = self.remove_starting_hex_prefix(private_key)
-        pem = SigningKey.from_string(bytes.fromhex(
-            private_key), curve=SECP256k1).to_pem()
-        self.signing_key = jwk.JWK.from_pem(pem)
-        self.algorithm = 'ES256K'
+        self.signing_key = self.get_signing_key(bytes.fromhex(private_key))
+        self.algorithm = self.ALGORITHM
+
+    def get_signing_key(self, private_key: bytes):
+        # Handles are looked up by a digest so the registry does not keep
+        # the raw private keys as dictionary keys
+        registry_key = (self.backend.name, hashlib.sha256(private_key).digest())
+        return self.signing_key_registry.get_or_load(
+            registry_key, lambda: self.backend.load_signing_key(private_key))
 
-    def remove_starting_hex_prefix(self, hex_data: str):
+    @staticmethod
+    def remove_starting_hex_prefix(hex_data: str):
         if hex_data.startswith('0x'):
             return hex_data[2:]
         return hex_data
@@ -35,23 +72,124 @@ class TokenService:
         return f'did:ala:{network_did.network}:{network_did.network_id}:{network_did.proxy_address}'
 
     def sign_jwt(self, jwt_data: JwtToken) -> str:
-        token = jwt.JWT(header=jwt_data.header,
-                        claims=jwt_data.payload, algs=[self.algorithm])
-        token.make_signed_token(self.signing_key)
-        return token.serialize()
+        return self.backend.sign(
+            self.signing_key, jwt_data.header, jwt_data.payload)
+
+    def sign_many(
+        self,
+        tokens: Iterable[JwtToken],
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int = None
+    ) -> Iterator[str]:
+        '''
+            Signs every JwtToken and yields the compact tokens in input
+            order. Process workers load the signing key once when they
+            start, from the key dumped by the backend, and at most
+            max_in_flight chunks are pending at a time.
+        '''
+        if executor == PROCESS_EXECUTOR:
+            return map_chunks(
+                sign_chunk, tokens, executor=executor,
+                max_workers=max_workers, chunk_size=chunk_size,
+                max_in_flight=max_in_flight,
+                initializer=init_signing_worker,
+                initargs=(self.backend.dump_signing_key(self.signing_key), self.backend))
+
+        return map_chunks(
+            self.sign_chunk, tokens, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size,
+            max_in_flight=max_in_flight)
+
+    def sign_chunk(self, chunk: List[JwtToken]) -> List[str]:
+        return [self.sign_jwt(jwt_data) for jwt_data in chunk]
 
     def verify_jwt(self, jwt_data: str, raw_public_key: str) -> bool:
+        if self.verification_cache is None:
+            return self.verify_jwt_signature(
+                jwt_data, raw_public_key, self.verifying_key_cache, self.backend)
+
+        cache_key = self.get_verification_cache_key(jwt_data, raw_public_key)
+        is_valid = self.verification_cache.get(cache_key)
+
+        if is_valid is None:
+            is_valid = self.verify_jwt_signature(
+                jwt_data, raw_public_key, self.verifying_key_cache, self.backend)
+
+            if is_valid or self.cache_negative_results:
+                self.verification_cache.set(
+                    cache_key, is_valid,
+                    expires_at=self.get_expiration(jwt_data))
+
+        return is_valid
+
+    def get_verification_cache_key(self, jwt_data: str, raw_public_key: str) -> bytes:
+        key_hex = self.remove_starting_hex_prefix(raw_public_key).lower()
+        return hashlib.sha256(f'{key_hex}.{jwt_data}'.encode('utf-8')).digest()
+
+    @staticmethod
+    def get_expiration(jwt_data: str):
+        # Only called once the signature has been checked, the payload is
+        # parsed then so cache hits never pay for it
         try:
-            pem = VerifyingKey.from_string(decode_hex(
-                raw_public_key), curve=SECP256k1).to_pem()
-            verifying_key = jwk.JWK.from_pem(pem)
-            jws_token = jws.JWS(jwt_data)
-            jws_token.deserialize(jwt_data)
-            jws_token.allowed_algs.extend([self.algorithm])
-            jws_token.verify(verifying_key, alg=self.algorithm)
-            return True
-        except jws.InvalidJWSSignature:
-            return False
+            exp = DecodedJwt(jwt_data).payload.get('exp')
+        except InvalidTokenError:
+            return None
+
+        return exp if isinstance(exp, (int, float)) and exp else None
+
+    def verify_many(
+        self,
+        tokens: Iterable[Tuple[str, str]],
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bool]:
+        '''
+            Verifies (jwt, raw_public_key) pairs and yields the results in
+            input order. With the process executor every worker keeps its
+            own verifying key cache, so the same issuer key is only parsed
+            once per worker.
+        '''
+        function = self.verify_chunk
+
+        if executor == PROCESS_EXECUTOR:
+            function = partial(verify_chunk, backend=self.backend)
+
+        return map_chunks(
+            function, tokens, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size)
+
+    def verify_chunk(self, chunk: List[Tuple[str, str]]) -> List[bool]:
+        return [
+            self.verify_jwt(jwt_data, raw_public_key)
+            for jwt_data, raw_public_key in chunk
+        ]
+
+    @classmethod
+    def verify_jwt_signature(
+        cls, jwt_data: str, raw_public_key: str,
+        verifying_key_cache: KeyCache = None, backend: CryptoBackend = None
+    ) -> bool:
+        backend = backend or cls.backend
+        verifying_key = cls.get_verifying_key(
+            raw_public_key, verifying_key_cache, backend)
+        return backend.verify(verifying_key, jwt_data)
+
+    @classmethod
+    def get_verifying_key(
+        cls, raw_public_key: str, verifying_key_cache: KeyCache = None,
+        backend: CryptoBackend = None
+    ):
+        if verifying_key_cache is None:
+            verifying_key_cache = cls.verifying_key_cache
+        backend = backend or cls.backend
+
+        key_hex = cls.remove_starting_hex_prefix(raw_public_key).lower()
+        return verifying_key_cache.get_or_load(
+            (backend.name, key_hex),
+            lambda: backend.load_verifying_key(decode_hex(key_hex)))
 
     @staticmethod
     def decode_jwt(jwt_data: str) -> dict:
@@ -62,6 +200,59 @@ class TokenService:
             "payload": json.loads(jws_token.objects.get('payload'))
         }
 
+    @staticmethod
+    def decode_jwt_lazy(jwt_data: str) -> DecodedJwt:
+        return DecodedJwt(jwt_data)
+
     @staticmethod
     def psm_hash(signed_jwt: str, did: str) -> HexBytes:
         return Web3.keccak(text=f'{signed_jwt}{did}')
+
+    @staticmethod
+    def psm_hash_many(
+        pairs: Iterable[Tuple[str, str]],
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> bytes:
+        '''
+            Computes psm_hash for every (signed_jwt, did) pair and returns
+            the 32 byte digests concatenated in input order, the digest of
+            pair i is result[32 * i:32 * (i + 1)].
+        '''
+        return b''.join(map_chunks(
+            psm_hash_chunk, pairs, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size))
+
+
+def psm_hash_chunk(chunk: List[Tuple[str, str]]) -> List[bytes]:
+    # pycryptodome keccak, the eth_hash backend web3 installs, without
+    # the per call dispatch of Web3.keccak
+    return [b''.join(
+        keccak.new(data=f'{signed_jwt}{did}'.encode('utf-8'), digest_bits=256).digest()
+        for signed_jwt, did in chunk
+    )]
+
+
+_worker_token_service = None
+
+
+def init_signing_worker(private_key: bytes, backend: CryptoBackend = None) -> None:
+    global _worker_token_service
+    _worker_token_service = TokenService(private_key.hex(), backend=backend)
+
+
+def sign_chunk(chunk: List[JwtToken]) -> List[str]:
+    return _worker_token_service.sign_chunk(chunk)
+
+
+def verify_chunk(
+    chunk: List[Tuple[str, str]], backend: CryptoBackend = None
+) -> List[bool]:
+    # Module level so it can be pickled into process pool workers, each
+    # worker verifies with its own copy of TokenService.verifying_key_cache
+    return [
+        TokenService.verify_jwt_signature(
+            jwt_data, raw_public_key, backend=backend)
+        for jwt_data, raw_public_key in chunk
+    ]
@@ -1,7 +1,13 @@
+from functools import cached_property, partial
+from typing import Any, Iterable, Iterator, List, Sequence
+
 from web3 import Web3
+from web3.contract import Contract
 
 from alastria_identity.types import Transaction, NetworkDid
 from alastria_identity.services import ContractsService
+from .executors import (
+    SERIAL_EXECUTOR, PROCESS_EXECUTOR, DEFAULT_CHUNK_SIZE, map_chunks)
 
 
 class TransactionService:
@@ -13,12 +19,17 @@ class TransactionService:
         self.contract_name = contract_name
         self.contract_address = self.config[contract_name]['address']
         self.endpoint = endpoint
-        self.contract_handler = ContractsService(
-            self.config
-        ).get_contract_handler(
-            contract_name, self.endpoint)
+        self.contracts_service = ContractsService.for_config(self.config)
+        self.encoder = self.contracts_service.get_encoder(contract_name)
         self.delegated_call_address = None
 
+    @cached_property
+    def contract_handler(self) -> Contract:
+        # Transactions are encoded with self.encoder, the web3 handler is
+        # only built for callers still using it
+        return self.contracts_service.get_contract_handler(
+            self.contract_name, self.endpoint)
+
     def enable_delegated_call(self):
         self.delegated_call_address = self.config[self.DEFAULT_CONTRACT_DELEGATED_NAME]['address']
         return self
@@ -26,14 +37,12 @@ class TransactionService:
     def generate_transaction(
         self, function_name: str, args: list
     ) -> Transaction:
-        encoded_abi  = self.contract_handler.encodeABI(
-            fn_name=function_name,
-            args=args)
-
-        payload = encoded_abi
+        encoded_abi = self.encoder.encode_bytes(function_name, args)
 
         if self.is_delegated_call():
             payload = self.delegated(encoded_abi)
+        else:
+            payload = '0x' + encoded_abi.hex()
 
         contract_address = self.delegated_call_address or self.contract_address
 
@@ -41,18 +50,114 @@ class TransactionService:
             to=Web3.toChecksumAddress(contract_address),
             data=payload)
 
+    def generate_transactions(
+        self,
+        function_name: str,
+        args_iterable: Iterable[Sequence[Any]],
+        raw: bool = False,
+        executor: str = SERIAL_EXECUTOR,
+        max_workers: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int = None
+    ) -> Iterator:
+        '''
+            Same as generate_transaction for every args of args_iterable,
+            yielded in input order. With raw the calldata is yielded as
+            bytes instead of a Transaction.
+
+            The function, the destination and the delegateCall prefix are
+            resolved once per chunk. Process workers get the ABIs they need
+            when they start, so the config may be a LiveConfig or a
+            ConfigSnapshot.
+        '''
+        if executor == PROCESS_EXECUTOR:
+            return map_chunks(
+                partial(generate_transactions_chunk, function_name=function_name, raw=raw),
+                args_iterable, executor=executor,
+                max_workers=max_workers, chunk_size=chunk_size,
+                max_in_flight=max_in_flight,
+                initializer=init_transaction_worker,
+                initargs=(
+                    self.get_worker_config(), self.contract_name,
+                    self.delegated_call_address))
+
+        return map_chunks(
+            partial(self.generate_transactions_chunk, function_name=function_name, raw=raw),
+            args_iterable, executor=executor,
+            max_workers=max_workers, chunk_size=chunk_size,
+            max_in_flight=max_in_flight)
+
+    def generate_transactions_chunk(
+        self, chunk: List[Sequence[Any]], function_name: str, raw: bool = False
+    ) -> list:
+        payloads = [self.encoder.encode_bytes(function_name, args) for args in chunk]
+
+        if self.is_delegated_call():
+            identity_manager_encoder = self.contracts_service.get_encoder(
+                self.DEFAULT_CONTRACT_DELEGATED_NAME)
+            delegated_args = [self.contract_checksum_address, 0]
+            payloads = [
+                identity_manager_encoder.encode_with_bytes(
+                    self.DEFAULT_DELEGATED_FUNCTION_NAME, delegated_args, payload)
+                for payload in payloads
+            ]
+
+        if raw:
+            return payloads
+
+        to = Web3.toChecksumAddress(self.delegated_call_address or self.contract_address)
+        return [Transaction(to=to, data='0x' + payload.hex()) for payload in payloads]
+
+    def get_worker_config(self) -> dict:
+        names = [self.contract_name]
+
+        if self.is_delegated_call():
+            names.append(self.DEFAULT_CONTRACT_DELEGATED_NAME)
+
+        return {
+            name: {
+                'functions': dict(self.config[name]['functions']),
+                'address': self.config[name]['address']
+            }
+            for name in names
+        }
+
     def delegated(self, delegated_data) -> str:
-        identity_manager_contract = ContractsService(
-            self.config
-        ).get_contract_handler(
-            self.DEFAULT_CONTRACT_DELEGATED_NAME,
-            self.endpoint)
-
-        return identity_manager_contract.encodeABI(
-            fn_name=self.DEFAULT_DELEGATED_FUNCTION_NAME,
-            args=[Web3.toChecksumAddress(
-                self.contract_address), 0, delegated_data]
-        )
+        '''
+            delegated_data is the call to wrap, as bytes or a hex string.
+            Only its length and content are encoded per call, the rest of
+            the delegateCall is encoded once per contract.
+        '''
+        identity_manager_encoder = self.contracts_service.get_encoder(
+            self.DEFAULT_CONTRACT_DELEGATED_NAME)
+
+        return '0x' + identity_manager_encoder.encode_with_bytes(
+            self.DEFAULT_DELEGATED_FUNCTION_NAME,
+            [self.contract_checksum_address, 0],
+            delegated_data).hex()
+
+    @cached_property
+    def contract_checksum_address(self) -> str:
+        return Web3.toChecksumAddress(self.contract_address)
 
     def is_delegated_call(self) -> bool:
         return bool(self.delegated_call_address)
+
+
+_worker_transaction_service = None
+
+
+def init_transaction_worker(
+    config: dict, contract_name: str, delegated_call_address: str = None
+) -> None:
+    global _worker_transaction_service
+    # Workers only encode, they don't need an endpoint
+    _worker_transaction_service = TransactionService(config, contract_name, None)
+    _worker_transaction_service.delegated_call_address = delegated_call_address
+
+
+def generate_transactions_chunk(
+    chunk: List[Sequence[Any]], function_name: str, raw: bool = False
+) -> list:
+    return _worker_transaction_service.generate_transactions_chunk(
+        chunk, function_name, raw)
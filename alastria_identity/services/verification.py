@@ -0,0 +1,138 @@
+import time
+from typing import Callable, Iterable, Optional
+
+from jwcrypto import jws
+
+from alastria_identity.types import (
+    CryptoBackend, DecodedJwt, VerificationResult, ReplayIndex)
+from alastria_identity.exceptions import InvalidTokenError
+from .key_cache import KeyCache
+from .tokens import TokenService
+
+
+class TokenVerifier:
+    '''
+        Runs a token through a list of stages and stops at the first one
+        rejecting it. The claim stages only look at the decoded token, so
+        keeping them before the signature stage rejects expired, not yet
+        valid or foreign tokens without touching the curve.
+
+        The jti stage goes last on purpose: a token has to be genuine
+        before it may burn its jti in the replay index. A bounded index
+        such as JtiReplayIndex fails open by default, once full it evicts
+        unexpired jtis and lets their tokens be replayed; build it with
+        reject_when_full to reject new tokens instead.
+
+        A stage is either the name of one of the check_<name> methods or a
+        callable with the same signature, returning None to accept the
+        token or the reason to reject it.
+    '''
+    DEFAULT_STAGES = ('alg', 'exp', 'nbf', 'iat', 'iss', 'signature', 'jti')
+
+    def __init__(
+        self,
+        stages: Iterable = DEFAULT_STAGES,
+        leeway: int = 0,
+        allowed_issuers: Iterable[str] = None,
+        algorithms: Iterable[str] = (TokenService.ALGORITHM,),
+        verifying_key_cache: KeyCache = None,
+        backend: CryptoBackend = None,
+        replay_index: ReplayIndex = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.stages = [self.get_stage(stage) for stage in stages]
+        self.leeway = leeway
+        self.allowed_issuers = set(allowed_issuers) if allowed_issuers is not None else None
+        self.algorithms = set(algorithms)
+        self.verifying_key_cache = verifying_key_cache
+        self.backend = backend
+        self.replay_index = replay_index
+        self.clock = clock
+
+    def get_stage(self, stage) -> tuple:
+        if callable(stage):
+            return stage.__name__, stage
+
+        try:
+            return stage, getattr(self, f'check_{stage}')
+        except AttributeError:
+            raise ValueError(f'Unknown verification stage {stage}')
+
+    def verify(self, jwt_data: str, raw_public_key: str) -> VerificationResult:
+        try:
+            token = DecodedJwt(jwt_data)
+            # Every stage can then read them as dicts
+            token.header, token.payload
+        except InvalidTokenError as error:
+            return VerificationResult(False, 'format', str(error))
+
+        now = self.clock()
+
+        for name, check in self.stages:
+            try:
+                reason = check(token, raw_public_key, now)
+            except InvalidTokenError as error:
+                reason = str(error)
+
+            if reason is not None:
+                return VerificationResult(False, name, reason)
+
+        return VerificationResult(True)
+
+    def check_alg(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        if token.header.get('alg') not in self.algorithms:
+            return f'Algorithm {token.header.get("alg")} is not allowed'
+
+    def check_exp(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        exp = self.get_time_claim(token, 'exp')
+
+        if exp is not None and now > exp + self.leeway:
+            return 'Token has expired'
+
+    def check_nbf(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        nbf = self.get_time_claim(token, 'nbf')
+
+        if nbf is not None and now + self.leeway < nbf:
+            return 'Token is not valid yet'
+
+    def check_iat(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        iat = self.get_time_claim(token, 'iat')
+
+        if iat is not None and now + self.leeway < iat:
+            return 'Token was issued in the future'
+
+    def check_iss(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        if self.allowed_issuers is not None and token.payload.get('iss') not in self.allowed_issuers:
+            return f'Issuer {token.payload.get("iss")} is not allowed'
+
+    def check_signature(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        try:
+            is_valid = TokenService.verify_jwt_signature(
+                token.jwt_data, raw_public_key,
+                self.verifying_key_cache, self.backend)
+        except jws.InvalidJWSObject:
+            is_valid = False
+
+        if not is_valid:
+            return 'Invalid signature'
+
+    def check_jti(self, token: DecodedJwt, raw_public_key: str, now: float) -> Optional[str]:
+        jti = token.payload.get('jti')
+
+        if self.replay_index is None or not jti:
+            return None
+        if not self.replay_index.check_and_add(jti, self.get_time_claim(token, 'exp')):
+            return f'Token {jti} has already been used'
+
+    @staticmethod
+    def get_time_claim(token: DecodedJwt, claim: str) -> Optional[float]:
+        # The token types leave optional time claims out, but the unsigned
+        # credential and presentation types send them as 0 or ''
+        value = token.payload.get(claim)
+
+        if value in (None, '', 0):
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise InvalidTokenError(f'Claim {claim} must be a NumericDate')
+
+        return value
@@ -0,0 +1,99 @@
+import pytest
+from web3 import Web3
+from web3.exceptions import InvalidAddress, ValidationError
+
+from alastria_identity.services import AbiEncoder
+
+ABI = [
+    {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': False, 'inputs': [{'name': '_addressEntity', 'type': 'address'}, {'name': '_name', 'type': 'string'}, {'name': '_cif', 'type': 'string'}, {'name': '_url_logo', 'type': 'string'}, {'name': '_url_createAID', 'type': 'string'}, {'name': '_url_AOA', 'type': 'string'}, {'name': '_active', 'type': 'bool'}], 'name': 'addEntity', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': False, 'inputs': [{'name': 'psmHash', 'type': 'bytes32'}, {'name': 'status', 'type': 'uint8'}], 'name': 'updateCredentialStatus', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': False, 'inputs': [{'name': 'publicKey', 'type': 'string'}], 'name': 'addKey', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': False, 'inputs': [{'name': 'publicKey', 'type': 'bytes32'}], 'name': 'addKey', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': False, 'inputs': [{'components': [{'name': 'owner', 'type': 'address'}, {'name': 'proofs', 'type': 'bytes[]'}], 'name': 'batch', 'type': 'tuple[]'}], 'name': 'submit', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'},
+    {'constant': True, 'inputs': [], 'name': 'version', 'outputs': [{'name': '', 'type': 'uint256'}], 'payable': False, 'stateMutability': 'view', 'type': 'function'},
+    {'anonymous': False, 'inputs': [{'indexed': True, 'name': 'signAddress', 'type': 'address'}], 'name': 'PreparedAlastriaID', 'type': 'event'}
+]
+ADDRESS = '0x57a9604784f82E5637624ca9c87015aaa31E300D'
+CALLS = [
+    ('delegateCall', [ADDRESS, 0, '0x1234abcd']),
+    ('delegateCall', [ADDRESS, 2 ** 200, b'\x00' * 70]),
+    ('addEntity', [ADDRESS, 'Entity', 'B12345678', 'https://logo', b'https://create', '', True]),
+    ('updateCredentialStatus', ['0x' + 'ab' * 32, 2]),
+    ('addKey', ['not a hash']),
+    ('submit', [[(ADDRESS, ['0x01', b'\x02\x03']), (ADDRESS, [])]]),
+    ('version', [])
+]
+
+
+@pytest.fixture
+def contract():
+    return Web3().eth.contract(abi=ABI)
+
+
+@pytest.mark.parametrize('function_name, args', CALLS)
+def test_encode_match_contract_encode_abi(contract, function_name, args):
+    encoder = AbiEncoder(ABI)
+
+    assert encoder.encode(function_name, args) == contract.encodeABI(
+        fn_name=function_name, args=args)
+
+
+def test_encode_reject_unknown_function():
+    with pytest.raises(ValidationError):
+        AbiEncoder(ABI).encode('PreparedAlastriaID', [ADDRESS])
+
+
+def test_encode_reject_wrong_arguments():
+    encoder = AbiEncoder(ABI)
+
+    with pytest.raises(ValidationError):
+        encoder.encode('delegateCall', [ADDRESS, 0])
+    with pytest.raises(ValidationError):
+        encoder.encode('updateCredentialStatus', ['0x1234', 'active'])
+
+
+def test_encode_reject_ambiguous_overload():
+    with pytest.raises(ValidationError):
+        AbiEncoder(ABI).encode('addKey', [b'\x01' * 32])
+
+
+def test_encode_reject_non_checksum_address():
+    with pytest.raises(InvalidAddress):
+        AbiEncoder(ABI).encode('delegateCall', [ADDRESS.lower(), 0, b''])
+
+
+@pytest.mark.parametrize('length', [0, 1, 31, 32, 33, 100])
+def test_encode_with_bytes_match_encode_bytes(length):
+    encoder = AbiEncoder(ABI)
+    data = bytes(range(length))
+
+    assert encoder.encode_with_bytes('delegateCall', [ADDRESS, 0], data) == \
+        encoder.encode_bytes('delegateCall', [ADDRESS, 0, data])
+    assert encoder.encode_with_bytes('delegateCall', [ADDRESS, 0], '0x' + data.hex()) == \
+        encoder.encode_bytes('delegateCall', [ADDRESS, 0, data])
+
+
+def test_encode_with_bytes_reject_other_dynamic_arguments():
+    set_data = {'inputs': [{'name': 'key', 'type': 'string'}, {'name': 'data', 'type': 'bytes'}], 'name': 'setData', 'type': 'function'}
+
+    with pytest.raises(ValueError):
+        AbiEncoder([set_data]).encode_with_bytes('setData', ['key'], b'')
+
+
+def test_encode_with_bytes_bound_prefixes_and_accept_unhashable_args():
+    forward = {'inputs': [{'name': 'targets', 'type': 'address[2]'}, {'name': 'data', 'type': 'bytes'}], 'name': 'forward', 'type': 'function'}
+
+    class SmallCacheEncoder(AbiEncoder):
+        PREFIX_CACHE_SIZE = 2
+
+    encoder = SmallCacheEncoder(ABI + [forward])
+
+    assert encoder.encode_with_bytes('forward', [[ADDRESS, ADDRESS]], b'\x01') == \
+        encoder.encode_bytes('forward', [[ADDRESS, ADDRESS], b'\x01'])
+
+    for value in range(5):
+        assert encoder.encode_with_bytes('delegateCall', [ADDRESS, value], b'\x01') == \
+            encoder.encode_bytes('delegateCall', [ADDRESS, value, b'\x01'])
+
+    assert len(encoder._prefixes) == 2
@@ -0,0 +1,110 @@
+import pytest
+import rlp
+from eth_account import Account
+from web3 import Web3
+
+from alastria_identity.services import CalldataDecoder, TransactionService
+
+PRIVATE_KEY = '0x' + '11' * 32
+DELEGATE_CALL = {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+ADD_SUBJECT_CREDENTIAL = {'constant': False, 'inputs': [{'name': 'subjectCredentialHash', 'type': 'bytes32'}, {'name': 'URI', 'type': 'string'}], 'name': 'addSubjectCredential', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+VERSION = {'constant': True, 'inputs': [], 'name': 'version', 'outputs': [{'name': '', 'type': 'uint256'}], 'payable': False, 'stateMutability': 'view', 'type': 'function'}
+CONFIG = {
+    'AlastriaIdentityManager': {'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9', 'functions': {'delegateCall': DELEGATE_CALL, 'version': VERSION}},
+    'AlastriaCredentialRegistry': {'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d', 'functions': {'addSubjectCredential': ADD_SUBJECT_CREDENTIAL, 'version': VERSION}}}
+CREDENTIAL_HASH = bytes(range(32))
+
+
+@pytest.fixture
+def delegated_transaction():
+    return TransactionService(
+        config=CONFIG,
+        contract_name='AlastriaCredentialRegistry',
+        endpoint=Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    ).enable_delegated_call().generate_transaction(
+        'addSubjectCredential', [CREDENTIAL_HASH, 'https://credentials/1'])
+
+
+def test_decode_unwrap_delegate_call(delegated_transaction):
+    call = CalldataDecoder(CONFIG).decode(delegated_transaction.data)
+
+    assert call.contract_name == 'AlastriaIdentityManager'
+    assert call.function_name == 'delegateCall'
+    assert call.args[:2] == ('0x57a9604784f82e5637624ca9c87015aaa31e300d', 0)
+    assert call.innermost.contract_name == 'AlastriaCredentialRegistry'
+    assert call.innermost.function_name == 'addSubjectCredential'
+    assert call.innermost.args == (CREDENTIAL_HASH, 'https://credentials/1')
+
+
+def test_decode_use_destination_for_shared_selectors():
+    decoder = CalldataDecoder(CONFIG)
+
+    call = decoder.decode('0x54fd4d50', to='0x57a9604784F82E5637624ca9c87015aaa31e300d')
+
+    assert (call.contract_name, call.function_name) == ('AlastriaCredentialRegistry', 'version')
+
+
+def test_decode_report_unknown_and_malformed_calldata():
+    decoder = CalldataDecoder(CONFIG)
+
+    unknown = decoder.decode('0xdeadbeef')
+    malformed = decoder.decode(b'\x59\x7b\x2e\x9b' + b'\x00' * 10)
+    short = decoder.decode(b'\x59')
+
+    assert unknown.selector == '0xdeadbeef' and unknown.function_name is None
+    assert malformed.function_name == 'delegateCall' and malformed.error
+    assert short.error
+
+
+@pytest.mark.parametrize('fields', [
+    {'gasPrice': 0},
+    {'gasPrice': 0, 'accessList': [], 'chainId': 2020},
+    {'maxFeePerGas': 10, 'maxPriorityFeePerGas': 1, 'chainId': 2020}
+])
+def test_decode_signed_transactions(delegated_transaction, fields):
+    signed = Account.sign_transaction({
+        'to': delegated_transaction.to, 'data': delegated_transaction.data,
+        'gas': 600000, 'nonce': 3, 'value': 0, **fields
+    }, PRIVATE_KEY).rawTransaction
+
+    call = CalldataDecoder(CONFIG).decode_transaction(signed)
+
+    assert call.innermost.args == (CREDENTIAL_HASH, 'https://credentials/1')
+
+
+def test_decode_transaction_report_invalid_transaction():
+    assert CalldataDecoder(CONFIG).decode_transaction(b'\x05\x01').error
+
+
+@pytest.mark.parametrize('executor', ['serial', 'process'])
+def test_decode_many_keep_order(delegated_transaction, executor):
+    items = [delegated_transaction.data, '0x54fd4d50', '0xdeadbeef'] * 5
+
+    calls = list(CalldataDecoder(CONFIG).decode_many(
+        iter(items), executor=executor, max_workers=2, chunk_size=4))
+
+    assert [call.innermost.function_name for call in calls] == \
+        ['addSubjectCredential', 'version', None] * 5
+
+
+def test_decode_report_invalid_hex():
+    call = CalldataDecoder(CONFIG).decode('0xzz')
+
+    assert call.function_name is None and call.error
+
+
+@pytest.mark.parametrize('raw_transaction', [
+    b'\x01' + rlp.encode(b'x' * 60),
+    b'\x02' + rlp.encode([b'', b'']),
+    rlp.encode([b''] * 3 + [[b'']] + [b''] * 5)
+])
+def test_decode_transaction_report_malformed_fields(raw_transaction):
+    assert CalldataDecoder(CONFIG).decode_transaction(raw_transaction).error
+
+
+def test_decode_many_continue_after_invalid_input(delegated_transaction):
+    calls = list(CalldataDecoder(CONFIG).decode_many(
+        ['0xzz', delegated_transaction.data]))
+
+    assert calls[0].error
+    assert calls[1].innermost.function_name == 'addSubjectCredential'
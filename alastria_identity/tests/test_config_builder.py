@@ -1,9 +1,14 @@
+import time
+import asyncio
+import threading
+import pytest
 from mock import Mock, patch
 from unittest.mock import patch
 
 from web3 import Web3
 
-from alastria_identity.services import IdentityConfigBuilder, ContractParser
+from alastria_identity.services import IdentityConfigBuilder, ContractParser, LiveConfig
+from alastria_identity.exceptions import ConfigTimeoutError
 
 
 def test_extract_contract_item_from_response():
@@ -55,3 +60,94 @@ def test_generate_return_valid_contracts(get_contracts):
     config_output = identity.generate()
 
     assert config_output.keys() == expected_output.keys()
+
+
+CONTRACTS = [
+    {'url': 'https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_libs_Eidas_sol_Eidas.abi',
+     'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d'},
+    {'url': 'https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_identityManager_AlastriaIdentityManager_sol_AlastriaIdentityManager.abi',
+     'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9'}
+]
+
+
+def slow_parse(parser):
+    # The first contract answers last
+    time.sleep(0.2 if 'Eidas' in parser.contract_url else 0.05)
+    return {'url': parser.contract_url}
+
+
+@patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS)
+def test_generate_fetch_contracts_concurrently_keeping_order(get_contracts):
+    # Both parsers have to be running at once to pass the barrier, and the
+    # first contract answers last
+    barrier = threading.Barrier(2, timeout=5)
+    manager_parsed = threading.Event()
+
+    def concurrent_parse(parser):
+        barrier.wait()
+
+        if 'Eidas' in parser.contract_url:
+            assert manager_parsed.wait(5)
+        else:
+            manager_parsed.set()
+        return {'url': parser.contract_url}
+
+    identity = IdentityConfigBuilder(
+        contracts_info_url='https://raw.githubusercontent.com/alastria/alastria-identity/master/contracts/ContractInfo.md',
+        parser_class=ContractParser,
+        max_workers=2)
+
+    with patch.object(ContractParser, 'parse', autospec=True, side_effect=concurrent_parse):
+        config_output = identity.generate()
+
+    assert list(config_output.keys()) == ['Eidas', 'AlastriaIdentityManager']
+    assert config_output['Eidas']['functions'] == {'url': CONTRACTS[0]['url']}
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=slow_parse)
+@patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS)
+def test_generate_raise_when_timeout_expires(get_contracts, parse):
+    identity = IdentityConfigBuilder(
+        contracts_info_url='https://raw.githubusercontent.com/alastria/alastria-identity/master/contracts/ContractInfo.md',
+        parser_class=ContractParser,
+        timeout=0.1)
+
+    with pytest.raises(ConfigTimeoutError):
+        identity.generate()
+
+
+def slow_get_contracts():
+    time.sleep(0.3)
+    return CONTRACTS
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=slow_parse)
+@patch.object(IdentityConfigBuilder, 'get_contracts', side_effect=slow_get_contracts)
+def test_generate_and_refresh_timeout_cover_contract_info(get_contracts, parse):
+    identity = IdentityConfigBuilder(
+        contracts_info_url='https://raw.githubusercontent.com/alastria/alastria-identity/master/contracts/ContractInfo.md',
+        parser_class=ContractParser,
+        timeout=0.1)
+    live_config = LiveConfig()
+
+    with pytest.raises(ConfigTimeoutError, match='ContractInfo.md'):
+        identity.generate()
+    with pytest.raises(ConfigTimeoutError, match='ContractInfo.md'):
+        identity.refresh(live_config)
+
+    assert parse.call_count == 0
+    assert live_config.version == 0
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=slow_parse)
+@patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS)
+def test_generate_async_return_same_config(get_contracts, parse):
+    identity = IdentityConfigBuilder(
+        contracts_info_url='https://raw.githubusercontent.com/alastria/alastria-identity/master/contracts/ContractInfo.md',
+        parser_class=ContractParser,
+        max_workers=1)
+
+    config_output = asyncio.run(identity.generate_async())
+
+    assert config_output == identity.generate()
+    assert list(config_output.keys()) == ['Eidas', 'AlastriaIdentityManager']
@@ -0,0 +1,84 @@
+import pytest
+from web3 import Web3
+
+from alastria_identity.services import ConfigSnapshot, TransactionService
+from alastria_identity.exceptions import InvalidSnapshotError
+
+DELEGATE_CALL = {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+CONFIG = {
+    'AlastriaIdentityManager': {
+        'functions': {
+            'delegateCall': DELEGATE_CALL,
+            'constructor': {'inputs': [{'name': '_version', 'type': 'uint256'}], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'constructor'}
+        },
+        'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9'
+    },
+    'Eidas': {
+        'functions': {},
+        'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d'
+    }
+}
+
+
+def test_load_return_same_config(tmp_path):
+    path = str(tmp_path / 'config.snapshot')
+    ConfigSnapshot.write(CONFIG, path)
+
+    snapshot = ConfigSnapshot.load(path)
+
+    assert list(snapshot) == ['AlastriaIdentityManager', 'Eidas']
+    assert snapshot['AlastriaIdentityManager']['functions'] == CONFIG['AlastriaIdentityManager']['functions']
+    assert snapshot['Eidas']['address'] == CONFIG['Eidas']['address']
+    assert dict(snapshot) == CONFIG
+
+
+def test_load_only_deserialize_accessed_contracts(tmp_path):
+    path = str(tmp_path / 'config.snapshot')
+    ConfigSnapshot.write(CONFIG, path)
+
+    snapshot = ConfigSnapshot.load(path)
+    snapshot['Eidas']
+
+    assert list(snapshot._contracts) == ['Eidas']
+
+
+def test_load_raise_when_content_was_modified(tmp_path):
+    path = tmp_path / 'config.snapshot'
+    ConfigSnapshot.write(CONFIG, str(path))
+    path.write_bytes(path.read_bytes().replace(b'delegateCall', b'delegateCalm'))
+
+    with pytest.raises(InvalidSnapshotError):
+        ConfigSnapshot.load(str(path))
+
+
+def test_load_raise_when_address_was_modified(tmp_path):
+    path = tmp_path / 'config.snapshot'
+    ConfigSnapshot.write(CONFIG, str(path))
+    path.write_bytes(path.read_bytes().replace(b'0x57a96047', b'0x57a96048'))
+
+    with pytest.raises(InvalidSnapshotError):
+        ConfigSnapshot.load(str(path))
+
+
+def test_close_unmap_snapshot(tmp_path):
+    path = str(tmp_path / 'config.snapshot')
+    ConfigSnapshot.write(CONFIG, path)
+
+    with ConfigSnapshot.load(path) as snapshot:
+        snapshot['Eidas']
+
+    assert snapshot.snapshot.closed
+
+
+def test_transaction_service_use_snapshot(tmp_path):
+    path = str(tmp_path / 'config.snapshot')
+    ConfigSnapshot.write(CONFIG, path)
+
+    transaction = TransactionService(
+        config=ConfigSnapshot.load(path),
+        contract_name='AlastriaIdentityManager',
+        endpoint=Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    ).generate_transaction('delegateCall', [
+        Web3.toChecksumAddress(CONFIG['Eidas']['address']), 0, b''])
+
+    assert transaction.data.startswith('0x597b2e9b')
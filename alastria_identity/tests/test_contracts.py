@@ -4,7 +4,7 @@ from unittest.mock import patch
 from web3 import Web3
 
 from alastria_identity.services import (
-    ContractsService, IdentityConfigBuilder, ContractParser)
+    ContractsService, IdentityConfigBuilder, ContractParser, LiveConfig)
 
 
 def test_get_identity_manager_abi():
@@ -19,3 +19,36 @@ def test_get_identity_manager_abi():
     abi = service.get_abi_by_contract_name('AlastriaIdentityManager')
 
     assert abi == expected_abi
+
+
+DELEGATE_CALL = {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+CONFIG = {'AlastriaIdentityManager': {'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9', 'functions': {'delegateCall': DELEGATE_CALL}}}
+
+
+def test_get_contract_handler_build_once_per_endpoint():
+    service = ContractsService(CONFIG)
+    endpoint = Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    other_endpoint = Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+
+    handler = service.get_contract_handler('AlastriaIdentityManager', endpoint)
+
+    assert service.get_contract_handler('AlastriaIdentityManager', endpoint) is handler
+    assert service.get_contract_handler('AlastriaIdentityManager', other_endpoint) is not handler
+
+
+def test_get_contract_handler_invalidated_when_config_changes():
+    config = LiveConfig(CONFIG)
+    service = ContractsService(config)
+    endpoint = Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    handler = service.get_contract_handler('AlastriaIdentityManager', endpoint)
+
+    config.swap(CONFIG, {})
+
+    assert service.get_contract_handler('AlastriaIdentityManager', endpoint) is not handler
+
+
+def test_for_config_share_service_per_config():
+    config = dict(CONFIG)
+
+    assert ContractsService.for_config(config) is ContractsService.for_config(config)
+    assert ContractsService.for_config(dict(CONFIG)) is not ContractsService.for_config(config)
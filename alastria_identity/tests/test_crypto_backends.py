@@ -0,0 +1,82 @@
+import pytest
+from jwcrypto.common import base64url_encode, base64url_decode
+from ecdsa.curves import SECP256k1
+from eth_keys import keys
+from eth_utils import decode_hex
+
+from alastria_identity.services.crypto_backends import (
+    JwcryptoBackend, CoincurveBackend, coincurve)
+
+private_key = decode_hex(
+    '1da6847600b0ee25e9ad9a52abbd786dd2502fa4005dd5af9310b7cc7a3b25db')
+public_key = keys.PrivateKey(private_key).public_key.to_bytes()
+other_public_key = keys.PrivateKey(decode_hex(
+    '5f25043160494cc82f7054ea935ebb7d9ac67bbe336ddf11b3b61b8d4731009e'
+)).public_key.to_bytes()
+header = {'alg': 'ES256K', 'typ': 'JWT'}
+payload = {'iss': 'did:ala:quor:redT:123', 'exp': 1, 'iat': 1}
+
+requires_coincurve = pytest.mark.skipif(
+    coincurve is None, reason='coincurve is not installed')
+BACKENDS = [
+    pytest.param(JwcryptoBackend, id='jwcrypto'),
+    pytest.param(CoincurveBackend, id='coincurve', marks=requires_coincurve)
+]
+
+
+def tamper_payload(token):
+    encoded_header, _, signature = token.split('.')
+    return '.'.join([
+        encoded_header, base64url_encode('{"iss":"other"}'), signature])
+
+
+def flip_s(token):
+    signing_input, signature = token.rsplit('.', 1)
+    raw_signature = base64url_decode(signature)
+    s = int.from_bytes(raw_signature[32:], 'big')
+    flipped_s = (SECP256k1.order - s).to_bytes(32, 'big')
+    return f'{signing_input}.{base64url_encode(raw_signature[:32] + flipped_s)}'
+
+
+@pytest.mark.parametrize('signer_class', BACKENDS)
+@pytest.mark.parametrize('verifier_class', BACKENDS)
+def test_tokens_verify_across_backends(signer_class, verifier_class):
+    signer, verifier = signer_class(), verifier_class()
+
+    token = signer.sign(signer.load_signing_key(private_key), header, payload)
+
+    assert verifier.verify(verifier.load_verifying_key(public_key), token)
+    assert not verifier.verify(
+        verifier.load_verifying_key(other_public_key), token)
+    assert not verifier.verify(
+        verifier.load_verifying_key(public_key), tamper_payload(token))
+
+
+@pytest.mark.parametrize('signer_class', BACKENDS)
+@pytest.mark.parametrize('verifier_class', BACKENDS)
+def test_high_s_signatures_verify_across_backends(signer_class, verifier_class):
+    signer, verifier = signer_class(), verifier_class()
+    token = signer.sign(signer.load_signing_key(private_key), header, payload)
+
+    assert verifier.verify(
+        verifier.load_verifying_key(public_key), flip_s(token))
+
+
+@pytest.mark.parametrize('backend_class', BACKENDS)
+def test_signed_tokens_share_header_and_payload_encoding(backend_class):
+    backend = backend_class()
+    reference = JwcryptoBackend()
+
+    token = backend.sign(backend.load_signing_key(private_key), header, payload)
+    reference_token = reference.sign(
+        reference.load_signing_key(private_key), header, payload)
+
+    assert token.rsplit('.', 1)[0] == reference_token.rsplit('.', 1)[0]
+
+
+@pytest.mark.parametrize('backend_class', BACKENDS)
+@pytest.mark.parametrize('raw_private_key', [private_key, b'\x00' + private_key[1:]])
+def test_dump_signing_key_return_raw_private_key(backend_class, raw_private_key):
+    backend = backend_class()
+
+    assert backend.dump_signing_key(backend.load_signing_key(raw_private_key)) == raw_private_key
@@ -0,0 +1,27 @@
+import pytest
+
+from alastria_identity.services.executors import map_chunks, chunked
+
+
+def double_chunk(chunk):
+    return [item * 2 for item in chunk]
+
+
+def test_chunked_split_items_keeping_remainder():
+    chunks = list(chunked(range(5), 2))
+
+    assert chunks == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_map_chunks_keep_input_order(executor):
+    results = map_chunks(
+        double_chunk, iter(range(100)), executor=executor,
+        max_workers=2, chunk_size=7, max_in_flight=3)
+
+    assert list(results) == [item * 2 for item in range(100)]
+
+
+def test_map_chunks_raise_with_unknown_executor():
+    with pytest.raises(ValueError):
+        list(map_chunks(double_chunk, [1], executor='gpu'))
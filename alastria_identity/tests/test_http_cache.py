@@ -0,0 +1,106 @@
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from alastria_identity.services import HttpCache, ContractParser, build_session
+from alastria_identity.exceptions import CacheMissError
+
+
+class AbiHandler(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    body = b'[{"name": "version", "type": "function"}]'
+    status_code = None
+    failures = 0
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(dict(self.headers))
+
+        if AbiHandler.failures:
+            AbiHandler.failures -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif self.status_code:
+            self.send_response(self.status_code)
+            self.end_headers()
+        elif self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', self.etag)
+            self.send_header('Content-Length', str(len(self.body)))
+            self.end_headers()
+            self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def abi_url():
+    AbiHandler.requests_seen = []
+    AbiHandler.status_code = None
+    AbiHandler.failures = 0
+    server = HTTPServer(('127.0.0.1', 0), AbiHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/sol_Eidas.abi'
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_revalidate_with_etag(abi_url, tmp_path):
+    cache = HttpCache(str(tmp_path))
+
+    first_response = cache.get(abi_url)
+    second_response = cache.get(abi_url)
+
+    assert first_response.content == second_response.content == AbiHandler.body
+    assert second_response.from_cache
+    assert AbiHandler.requests_seen[1]['If-None-Match'] == AbiHandler.etag
+
+
+def test_get_serve_stale_copy_on_server_error(abi_url, tmp_path):
+    session = build_session(retries=0)
+    cache = HttpCache(str(tmp_path))
+    cache.get(abi_url, session=session)
+    AbiHandler.status_code = 503
+
+    assert cache.get(abi_url, session=session).content == AbiHandler.body
+    with pytest.raises(requests.HTTPError):
+        HttpCache(str(tmp_path), stale_if_error=0).get(abi_url, session=session)
+
+
+def test_get_offline_only_use_cached_copies(abi_url, tmp_path):
+    HttpCache(str(tmp_path)).get(abi_url)
+    offline_cache = HttpCache(str(tmp_path), offline=True)
+
+    assert offline_cache.get(abi_url).content == AbiHandler.body
+    assert len(AbiHandler.requests_seen) == 1
+    with pytest.raises(CacheMissError):
+        offline_cache.get(f'{abi_url}.missing')
+
+
+def test_contract_parser_use_cache(abi_url, tmp_path):
+    cache = HttpCache(str(tmp_path))
+
+    ContractParser(abi_url, cache=cache).parse()
+    functions = ContractParser(abi_url, cache=cache).parse()
+
+    assert functions == {'version': {'name': 'version', 'type': 'function'}}
+    assert 'If-None-Match' in AbiHandler.requests_seen[1]
+
+
+def test_session_retry_server_errors(abi_url):
+    AbiHandler.failures = 2
+    session = build_session(retries=2, backoff_factor=0)
+
+    response = session.get(abi_url)
+
+    assert response.content == AbiHandler.body
+    assert len(AbiHandler.requests_seen) == 3
@@ -1,10 +1,12 @@
+import pytest
 from mock import Mock, patch, MagicMock
 from unittest.mock import patch
 
 from web3 import Web3
+from eth_account import Account
 
-from alastria_identity.services import UserIdentityService
-from alastria_identity.types import UserIdentity, Transaction
+from alastria_identity.services import UserIdentityService, NonceManager
+from alastria_identity.types import UserIdentity, Transaction, DEFAULT_NONCE
 
 
 def test_update_transaction_nonce():
@@ -25,3 +27,107 @@ def test_update_transaction_nonce():
     updated_transaction = identity.update_transaction_nonce(transaction)
 
     assert updated_transaction.nonce != default_nonce
+
+
+def test_update_transaction_nonce_with_nonce_manager():
+    endpoint = MagicMock()
+    endpoint.eth.getTransactionCount.return_value = 3
+    user_identity = UserIdentity(
+        endpoint=endpoint,
+        address='0x123',
+        private_key='1234',
+        nonce=1,
+        transactions=[]
+    )
+    identity = UserIdentityService(user_identity, nonce_manager=NonceManager(endpoint))
+
+    nonces = [identity.update_transaction_nonce(Transaction()).nonce for _ in range(3)]
+
+    assert nonces == [3, 4, 5]
+    endpoint.eth.getTransactionCount.assert_called_once()
+
+
+@pytest.mark.parametrize('executor', ['serial', 'process'])
+def test_sign_transactions_assign_nonces_in_order(executor):
+    private_key = '0x' + '11' * 32
+    endpoint = MagicMock()
+    endpoint.eth.getTransactionCount.return_value = 10
+    endpoint.eth.account = Account
+    user_identity = UserIdentity(
+        endpoint=endpoint,
+        address=Account.from_key(private_key).address,
+        private_key=private_key,
+        nonce=0,
+        transactions=[]
+    )
+    identity = UserIdentityService(user_identity)
+    transactions = (
+        Transaction(to='0x57a9604784f82E5637624ca9c87015aaa31E300D', data=f'0x{index:02x}')
+        for index in range(9))
+
+    signed = list(identity.sign_transactions(
+        transactions, executor=executor, max_workers=2, chunk_size=2))
+
+    assert [Account.recover_transaction(raw) for raw in signed] == [user_identity.address] * 9
+    assert signed == [
+        identity.sign_transaction(Transaction(
+            to='0x57a9604784f82E5637624ca9c87015aaa31E300D', data=f'0x{index:02x}', nonce=10 + index))
+        for index in range(9)
+    ]
+    endpoint.eth.getTransactionCount.assert_called_once()
+
+
+def build_signing_service(count):
+    private_key = '0x' + '11' * 32
+    endpoint = MagicMock()
+    endpoint.eth.getTransactionCount.return_value = count
+    endpoint.eth.account = Account
+    user_identity = UserIdentity(
+        endpoint=endpoint,
+        address=Account.from_key(private_key).address,
+        private_key=private_key,
+        nonce=0,
+        transactions=[]
+    )
+    return UserIdentityService(user_identity, NonceManager(endpoint))
+
+
+def build_transactions(count):
+    return [
+        Transaction(to='0x57a9604784f82E5637624ca9c87015aaa31E300D', data=f'0x{index:02x}')
+        for index in range(count)
+    ]
+
+
+def test_sign_transactions_release_nonces_read_ahead_when_closed():
+    identity = build_signing_service(10)
+    transactions = build_transactions(9)
+
+    signed = identity.sign_transactions(
+        transactions, executor='thread', max_workers=2, chunk_size=2, max_in_flight=2)
+    first = [next(signed) for _ in range(3)]
+    signed.close()
+
+    assert len(first) == 3
+    assert identity.nonce_manager.next_nonce(identity.identity.address) == 13
+    assert all(transaction.nonce == DEFAULT_NONCE for transaction in transactions[3:])
+
+
+def test_sign_transactions_release_nonces_when_a_chunk_fails():
+    identity = build_signing_service(10)
+    transactions = build_transactions(4)
+    sign_transaction = identity.sign_transaction
+
+    def fail_on_third(transaction):
+        if transaction is transactions[2]:
+            raise ValueError('Could not sign')
+        return sign_transaction(transaction)
+
+    signed = []
+    with patch.object(identity, 'sign_transaction', side_effect=fail_on_third):
+        with pytest.raises(ValueError):
+            for raw_transaction in identity.sign_transactions(transactions, chunk_size=2):
+                signed.append(raw_transaction)
+
+    assert len(signed) == 2
+    assert identity.nonce_manager.next_nonce(identity.identity.address) == 12
@@ -0,0 +1,47 @@
+from mock import patch
+
+from alastria_identity.services import KeyCache
+
+
+def test_get_or_load_only_loads_once():
+    cache = KeyCache(maxsize=2)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return 'key'
+
+    first = cache.get_or_load('0x1', loader)
+    second = cache.get_or_load('0x1', loader)
+
+    assert first == second == 'key'
+    assert len(loads) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_set_evicts_least_recently_used():
+    cache = KeyCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+
+    cache.set('c', 3)
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    assert cache.evictions == 1
+
+
+@patch('alastria_identity.services.key_cache.time')
+def test_get_return_default_when_entry_expired(mock_time):
+    mock_time.monotonic.return_value = 100
+    cache = KeyCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+
+    mock_time.monotonic.return_value = 111
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.misses == 1
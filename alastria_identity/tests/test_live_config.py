@@ -0,0 +1,111 @@
+from mock import patch
+
+from alastria_identity.services import (
+    IdentityConfigBuilder, ContractParser, LiveConfig, ConfigRefresher)
+
+EIDAS_URL = 'https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_libs_Eidas_sol_Eidas.abi'
+MANAGER_URL = 'https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_identityManager_AlastriaIdentityManager_sol_AlastriaIdentityManager.abi'
+REGISTRY_URL = 'https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_registry_AlastriaCredentialRegistry_sol_AlastriaCredentialRegistry.abi'
+CONTRACTS = [
+    {'url': EIDAS_URL, 'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d'},
+    {'url': MANAGER_URL, 'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9'}
+]
+
+
+def parse_url(parser):
+    return {'url': parser.contract_url}
+
+
+def build_identity():
+    return IdentityConfigBuilder(
+        contracts_info_url='https://raw.githubusercontent.com/alastria/alastria-identity/master/contracts/ContractInfo.md',
+        parser_class=ContractParser)
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=parse_url)
+def test_first_refresh_fill_empty_config(parse):
+    identity = build_identity()
+    live_config = LiveConfig()
+
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS):
+        changes = identity.refresh(live_config)
+
+    assert changes.added == ['Eidas', 'AlastriaIdentityManager']
+    assert changes.version == live_config.version == 1
+    assert live_config['Eidas'] == {'functions': {'url': EIDAS_URL}, 'address': CONTRACTS[0]['address']}
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=parse_url)
+def test_refresh_only_fetch_new_and_changed_contracts(parse):
+    identity = build_identity()
+    live_config = LiveConfig()
+
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS):
+        identity.refresh(live_config)
+    previous = live_config.snapshot()
+    parse.reset_mock()
+
+    updated_contracts = [
+        {'url': EIDAS_URL, 'address': '0x0000000000000000000000000000000000000001'},
+        {'url': REGISTRY_URL, 'address': '0x0000000000000000000000000000000000000002'}
+    ]
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=updated_contracts):
+        changes = identity.refresh(live_config)
+
+    assert changes.added == ['AlastriaCredentialRegistry']
+    assert changes.changed == ['Eidas']
+    assert changes.removed == ['AlastriaIdentityManager']
+    # Eidas was redeployed at the same url, its ABI may have changed too
+    assert [call.args[0].contract_url for call in parse.call_args_list] == [EIDAS_URL, REGISTRY_URL]
+    assert live_config['Eidas']['address'] == '0x0000000000000000000000000000000000000001'
+    assert 'AlastriaIdentityManager' not in live_config
+    # The previous snapshot is never modified
+    assert 'AlastriaIdentityManager' in previous
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=parse_url)
+def test_refresh_without_changes_keep_version(parse):
+    identity = build_identity()
+    live_config = LiveConfig()
+
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS):
+        identity.refresh(live_config)
+        parse.reset_mock()
+        changes = identity.refresh(live_config)
+
+    assert not changes
+    assert live_config.version == 1
+    parse.assert_not_called()
+
+
+@patch.object(ContractParser, 'parse', autospec=True, side_effect=parse_url)
+def test_refresh_keep_unchanged_functions(parse):
+    identity = build_identity()
+    live_config = LiveConfig()
+
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=CONTRACTS):
+        identity.refresh(live_config)
+    previous = live_config.snapshot()
+    parse.reset_mock()
+
+    updated_contracts = [CONTRACTS[0], {'url': REGISTRY_URL, 'address': '0x0000000000000000000000000000000000000002'}]
+    with patch.object(IdentityConfigBuilder, 'get_contracts', return_value=updated_contracts):
+        identity.refresh(live_config)
+
+    assert [call.args[0].contract_url for call in parse.call_args_list] == [REGISTRY_URL]
+    assert live_config['Eidas']['functions'] is previous['Eidas']['functions']
+    assert live_config.state() == (2, live_config.snapshot(), {
+        'Eidas': CONTRACTS[0], 'AlastriaCredentialRegistry': updated_contracts[1]})
+
+
+def test_refresher_keep_config_on_error():
+    live_config = LiveConfig({'Eidas': {'functions': {}, 'address': '0x0'}})
+    errors = []
+    identity = build_identity()
+
+    with patch.object(IdentityConfigBuilder, 'get_contracts', side_effect=OSError('down')):
+        changes = ConfigRefresher(identity, live_config, on_error=errors.append).refresh()
+
+    assert changes is None
+    assert isinstance(errors[0], OSError)
+    assert live_config['Eidas']['address'] == '0x0'
@@ -0,0 +1,103 @@
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from alastria_identity.services import (
+    AbiBundle, LocalContractParser, IdentityConfigBuilder, HttpCache,
+    build_session)
+
+EIDAS_ABI = [{'constant': True, 'inputs': [], 'name': 'version', 'outputs': [{'name': '', 'type': 'uint256'}], 'payable': False, 'stateMutability': 'view', 'type': 'function'}]
+MANAGER_ABI = [
+    {'inputs': [{'name': '_version', 'type': 'uint256'}], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'constructor'},
+    {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+]
+CONTRACT_INFO = '''| Contract Name | Address | ABI |
+| :------------ | :-------| :--- |
+| Eidas | 0x57a9604784f82e5637624ca9c87015aaa31e300d | https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_libs_Eidas_sol_Eidas.abi |
+| AlastriaIdentityManager | 0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9 | https://github.com/alastria/alastria-identity/blob/develop/contracts/abi/__contracts_identityManager_AlastriaIdentityManager_sol_AlastriaIdentityManager.abi |
+'''
+FILES = {
+    'ContractInfo.md': CONTRACT_INFO,
+    'abi/__contracts_libs_Eidas_sol_Eidas.abi': json.dumps(EIDAS_ABI),
+    'abi/__contracts_identityManager_AlastriaIdentityManager_sol_AlastriaIdentityManager.abi': json.dumps(MANAGER_ABI)
+}
+EXPECTED_CONFIG = {
+    'Eidas': {
+        'functions': {'version': EIDAS_ABI[0]},
+        'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d'
+    },
+    'AlastriaIdentityManager': {
+        'functions': {'constructor': MANAGER_ABI[0], 'delegateCall': MANAGER_ABI[1]},
+        'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9'
+    }
+}
+
+
+@pytest.fixture
+def bundle_directory(tmp_path):
+    for name, content in FILES.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(content)
+    return tmp_path
+
+
+@pytest.fixture(params=['directory', 'zip', 'tar'])
+def bundle_path(request, bundle_directory, tmp_path_factory):
+    if request.param == 'directory':
+        return str(bundle_directory)
+
+    path = tmp_path_factory.mktemp('archives') / f'abis.{request.param}'
+
+    if request.param == 'zip':
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name in FILES:
+                archive.write(bundle_directory / name, name)
+    else:
+        with tarfile.open(path, 'w:gz') as archive:
+            for name in FILES:
+                archive.add(bundle_directory / name, name)
+
+    return str(path)
+
+
+def test_generate_from_bundle(bundle_path):
+    builder = IdentityConfigBuilder.from_bundle(bundle_path)
+
+    assert builder.generate() == EXPECTED_CONFIG
+
+
+def test_generate_from_bundle_ignore_http_options(bundle_directory, tmp_path):
+    builder = IdentityConfigBuilder.from_bundle(
+        str(bundle_directory), request_timeout=5, session=build_session(),
+        cache=HttpCache(str(tmp_path / 'cache')))
+
+    assert builder.generate() == EXPECTED_CONFIG
+
+
+def test_bundle_find_abi_by_contract_name(bundle_directory):
+    bundle = AbiBundle(str(bundle_directory))
+
+    parser = LocalContractParser('abis/sol_Eidas.abi', bundle=bundle)
+
+    assert parser.parse() == {'version': EIDAS_ABI[0]}
+
+
+def test_parse_local_file_without_bundle(bundle_directory):
+    path = bundle_directory / 'abi/__contracts_libs_Eidas_sol_Eidas.abi'
+
+    assert LocalContractParser(str(path)).parse() == {'version': EIDAS_ABI[0]}
+
+
+def test_bundle_raise_on_missing_abi(bundle_directory):
+    parser = LocalContractParser('sol_Missing.abi', bundle=AbiBundle(str(bundle_directory)))
+
+    with pytest.raises(FileNotFoundError):
+        parser.parse()
+
+
+def test_bundle_reject_unknown_path(bundle_directory):
+    with pytest.raises(ValueError):
+        AbiBundle(str(bundle_directory / 'ContractInfo.md'))
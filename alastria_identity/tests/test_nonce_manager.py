@@ -0,0 +1,51 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from mock import MagicMock
+
+from alastria_identity.services import NonceManager
+
+ADDRESS = '0x57a9604784f82E5637624ca9c87015aaa31E300D'
+
+
+def build_endpoint(count):
+    endpoint = MagicMock()
+    endpoint.eth.getTransactionCount.return_value = count
+    return endpoint
+
+
+def test_next_nonce_fetch_pending_count_once():
+    endpoint = build_endpoint(7)
+    nonce_manager = NonceManager(endpoint)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        nonces = list(pool.map(lambda _: nonce_manager.next_nonce(ADDRESS), range(200)))
+
+    assert sorted(nonces) == list(range(7, 207))
+    endpoint.eth.getTransactionCount.assert_called_once_with(ADDRESS, 'pending')
+
+
+def test_reserve_return_consecutive_nonces():
+    nonce_manager = NonceManager(build_endpoint(2))
+
+    assert nonce_manager.reserve(ADDRESS, 3) == range(2, 5)
+    assert nonce_manager.next_nonce(ADDRESS.lower()) == 5
+
+
+def test_release_only_take_back_last_nonce():
+    nonce_manager = NonceManager(build_endpoint(0))
+    first = nonce_manager.next_nonce(ADDRESS)
+    second = nonce_manager.next_nonce(ADDRESS)
+
+    assert not nonce_manager.release(ADDRESS, first)
+    assert nonce_manager.release(ADDRESS, second)
+    assert nonce_manager.next_nonce(ADDRESS) == second
+
+
+def test_reconcile_restart_from_node_count():
+    endpoint = build_endpoint(0)
+    nonce_manager = NonceManager(endpoint)
+    nonce_manager.reserve(ADDRESS, 5)
+    endpoint.eth.getTransactionCount.return_value = 3
+
+    assert nonce_manager.reconcile(ADDRESS) == 3
+    assert nonce_manager.next_nonce(ADDRESS) == 3
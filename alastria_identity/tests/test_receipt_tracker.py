@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+from web3.exceptions import TimeExhausted
+
+from alastria_identity.services import ReceiptTracker
+
+FIRST_HASH = '0x' + '01' * 32
+SECOND_HASH = '0x' + '02' * 32
+
+
+class FakeProvider:
+    '''
+        A chain of blocks, a reorg replaces every block from a number on
+        with blocks of another fork
+    '''
+
+    def __init__(self):
+        self.blocks = {}
+        self.requests = []
+
+        for _ in range(11):
+            self.mine()
+
+    @property
+    def head(self):
+        return len(self.blocks) - 1
+
+    def mine(self, *transaction_hashes, fork='a'):
+        number = len(self.blocks)
+        self.blocks[number] = {
+            'number': hex(number),
+            'hash': '0x' + fork * 2 + f'{number:062x}',
+            'transactions': list(transaction_hashes)
+        }
+
+    def reorg(self, number, *blocks, fork='b'):
+        for replaced in range(number, len(self.blocks)):
+            del self.blocks[replaced]
+        for transaction_hashes in blocks:
+            self.mine(*transaction_hashes, fork=fork)
+
+    def get_receipt(self, transaction_hash):
+        for block in self.blocks.values():
+            if transaction_hash in block['transactions']:
+                return {
+                    'transactionHash': transaction_hash,
+                    'blockNumber': block['number'],
+                    'blockHash': block['hash'],
+                    'status': '0x1'
+                }
+
+    async def make_request(self, method, params):
+        self.requests.append(method)
+
+        if method == 'eth_blockNumber':
+            result = hex(self.head)
+        elif method == 'eth_getBlockByNumber':
+            result = self.blocks.get(int(params[0], 16))
+        else:
+            result = self.get_receipt(params[0])
+
+        return {'jsonrpc': '2.0', 'id': 1, 'result': result}
+
+
+async def advance(provider, *transaction_hashes):
+    provider.mine(*transaction_hashes)
+    await asyncio.sleep(0.03)
+
+
+def test_track_resolve_after_confirmations():
+    provider = FakeProvider()
+    tracker = ReceiptTracker(provider, confirmations=3, poll_interval=0.01)
+
+    async def scenario():
+        future = tracker.track(bytes.fromhex('01' * 32))
+        await asyncio.sleep(0.03)
+        await advance(provider, FIRST_HASH)
+        await advance(provider)
+        assert not future.done()
+        await advance(provider)
+        return await asyncio.wait_for(future, 1)
+
+    receipt = asyncio.run(scenario())
+
+    assert receipt['transactionHash'] == FIRST_HASH
+    assert receipt['blockNumber'] == hex(11)
+
+
+def test_track_only_fetch_receipts_of_included_transactions():
+    provider = FakeProvider()
+    tracker = ReceiptTracker(provider, poll_interval=0.01)
+
+    async def scenario():
+        first = tracker.track(FIRST_HASH)
+        tracker.track(SECOND_HASH)
+        await asyncio.sleep(0.03)
+
+        for _ in range(5):
+            await advance(provider)
+        await advance(provider, FIRST_HASH)
+        receipt = await asyncio.wait_for(first, 1)
+        await tracker.close()
+        return receipt
+
+    assert asyncio.run(scenario())['blockNumber'] == hex(16)
+    # Once for each new transaction and once for the included one
+    assert provider.requests.count('eth_getTransactionReceipt') == 3
+    assert provider.requests.count('eth_getBlockByNumber') == 6
+
+
+def test_track_check_block_hash_before_resolving():
+    provider = FakeProvider()
+    tracker = ReceiptTracker(provider, confirmations=2, poll_interval=0.01)
+
+    async def scenario():
+        future = tracker.track(FIRST_HASH)
+        await asyncio.sleep(0.03)
+        await advance(provider, FIRST_HASH)
+        # Block 11 is replaced by another one including the transaction
+        provider.reorg(11, [FIRST_HASH])
+        await advance(provider)
+        await asyncio.sleep(0.03)
+        return await asyncio.wait_for(future, 1)
+
+    receipt = asyncio.run(scenario())
+
+    assert receipt['blockHash'] == provider.blocks[11]['hash']
+    assert receipt['blockHash'].startswith('0xbb')
+
+
+def test_track_wait_again_after_reorg():
+    provider = FakeProvider()
+    tracker = ReceiptTracker(provider, confirmations=2, poll_interval=0.01)
+
+    async def scenario():
+        future = tracker.track(FIRST_HASH)
+        await asyncio.sleep(0.03)
+        await advance(provider, FIRST_HASH)
+        # The block is replaced and the transaction goes back to the pool
+        provider.reorg(11, [])
+        await advance(provider)
+        await advance(provider)
+        assert not future.done()
+        await advance(provider, FIRST_HASH)
+        await advance(provider)
+        return await asyncio.wait_for(future, 1)
+
+    assert asyncio.run(scenario())['blockNumber'] == hex(14)
+
+
+def test_track_raise_on_timeout():
+    provider = FakeProvider()
+    tracker = ReceiptTracker(provider, poll_interval=0.01, timeout=0.05)
+    done = []
+
+    async def scenario():
+        await tracker.track(FIRST_HASH, callback=done.append)
+
+    with pytest.raises(TimeExhausted):
+        asyncio.run(scenario())
+    assert len(done) == 1
+
+
+class BrokenProvider(FakeProvider):
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error
+
+    async def make_request(self, method, params):
+        if self.error is not None:
+            raise self.error
+        if method == 'eth_blockNumber':
+            return {'jsonrpc': '2.0', 'id': 1, 'result': 'garbage'}
+        return {'jsonrpc': '2.0', 'id': 1, 'result': {'blockNumber': 'garbage'}}
+
+
+@pytest.mark.parametrize('provider', [BrokenProvider(), BrokenProvider(ValueError('Bad response'))])
+def test_track_time_out_when_polls_fail(provider):
+    errors = []
+    tracker = ReceiptTracker(provider, poll_interval=0.01, on_error=errors.append)
+
+    async def scenario():
+        await asyncio.wait_for(tracker.track(FIRST_HASH, timeout=0.1), 1)
+
+    with pytest.raises(TimeExhausted):
+        asyncio.run(scenario())
+    assert errors and all(isinstance(error, ValueError) for error in errors)
+    assert tracker.last_error is errors[-1]
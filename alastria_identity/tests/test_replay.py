@@ -0,0 +1,100 @@
+from multiprocessing import Pool
+
+from alastria_identity.services import JtiReplayIndex, SqliteReplayIndex
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_check_and_add_detect_replayed_jti():
+    index = JtiReplayIndex(clock=Clock(1000))
+
+    assert index.check_and_add('jti-1', exp=1100)
+    assert not index.check_and_add('jti-1', exp=1100)
+    assert 'jti-1' in index
+
+
+def test_check_and_add_accept_jti_again_once_expired():
+    clock = Clock(1000)
+    index = JtiReplayIndex(bucket_seconds=60, clock=clock)
+    index.check_and_add('jti-1', exp=1010)
+    index.check_and_add('jti-2', exp=1500)
+
+    clock.now = 1200
+
+    assert index.check_and_add('jti-1', exp=1300)
+    assert len(index) == 2
+
+
+def test_check_and_add_evict_closest_expiration_over_max_entries():
+    index = JtiReplayIndex(max_entries=2, clock=Clock(1000))
+    index.check_and_add('late', exp=5000)
+    index.check_and_add('soon', exp=1100)
+
+    index.check_and_add('new', exp=3000)
+
+    assert len(index) == 2
+    assert 'soon' not in index
+    assert 'late' in index
+    assert index.evictions == 1
+
+
+def test_check_and_add_keep_new_jti_expiring_first():
+    index = JtiReplayIndex(max_entries=2, clock=Clock(1000))
+    index.check_and_add('late', exp=5000)
+    index.check_and_add('later', exp=6000)
+
+    assert index.check_and_add('new', exp=1100)
+    assert 'new' in index
+    assert not index.check_and_add('new', exp=1100)
+
+
+def test_check_and_add_reject_new_jti_when_full():
+    clock = Clock(1000)
+    index = JtiReplayIndex(max_entries=2, bucket_seconds=60, reject_when_full=True, clock=clock)
+    index.check_and_add('soon', exp=1100)
+    index.check_and_add('late', exp=5000)
+
+    assert not index.check_and_add('new', exp=3000)
+    assert 'soon' in index
+    assert index.evictions == 0
+    assert index.rejections == 1
+
+    clock.now = 1200
+
+    assert index.check_and_add('new', exp=3000)
+
+
+def add_to_shared_index(arguments):
+    path, jti = arguments
+    return SqliteReplayIndex(path).check_and_add(jti, exp=2 ** 40)
+
+
+def test_sqlite_index_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'replay.db')
+
+    with Pool(4) as pool:
+        results = pool.map(add_to_shared_index, [(path, 'jti-1')] * 8)
+
+    assert results.count(True) == 1
+    assert 'jti-1' in SqliteReplayIndex(path)
+
+
+def test_sqlite_index_purge_expired_and_excess_entries(tmp_path):
+    clock = Clock(1000)
+    index = SqliteReplayIndex(
+        str(tmp_path / 'replay.db'), max_entries=1, clock=clock)
+    index.check_and_add('expired', exp=1010)
+    index.check_and_add('soon', exp=1500)
+    index.check_and_add('late', exp=2000)
+
+    clock.now = 1100
+    index.purge()
+
+    assert len(index) == 1
+    assert 'late' in index
@@ -0,0 +1,242 @@
+import asyncio
+
+import pytest
+from mock import MagicMock
+from eth_account import Account
+from eth_utils import keccak
+
+from alastria_identity.services import TransactionSubmitter, NonceManager
+from alastria_identity.exceptions import TransactionSubmissionError
+
+
+class FakeProvider:
+    def __init__(self, failures=0, error=None, rpc_failures=()):
+        self.failures = failures
+        self.error = error
+        self.rpc_failures = list(rpc_failures)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.sent = []
+
+    async def make_request(self, method, params):
+        assert method == 'eth_sendRawTransaction'
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            await asyncio.sleep(0.01)
+
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError('Connection reset')
+            if self.rpc_failures:
+                return {'jsonrpc': '2.0', 'id': 1, 'error': self.rpc_failures.pop(0)}
+            if self.error is not None:
+                return {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32000, 'message': self.error}}
+
+            self.sent.append(params[0])
+            return {'jsonrpc': '2.0', 'id': 1, 'result': '0x' + keccak(hexstr=params[0]).hex()}
+        finally:
+            self.in_flight -= 1
+
+
+RAW_TRANSACTIONS = [bytes([index]) * 100 for index in range(20)]
+
+
+def test_submit_all_keep_window_and_order():
+    provider = FakeProvider()
+    submitter = TransactionSubmitter(provider, max_in_flight=4)
+
+    hashes = asyncio.run(submitter.submit_all(RAW_TRANSACTIONS))
+
+    assert hashes == [keccak(raw_transaction) for raw_transaction in RAW_TRANSACTIONS]
+    assert provider.max_in_flight == 4
+    assert provider.sent == ['0x' + raw_transaction.hex() for raw_transaction in RAW_TRANSACTIONS]
+
+
+def test_submit_retry_transient_errors():
+    provider = FakeProvider(failures=2)
+    submitter = TransactionSubmitter(provider, backoff_factor=0)
+
+    async def submit():
+        return await (await submitter.submit(RAW_TRANSACTIONS[0]))
+
+    assert asyncio.run(submit()) == keccak(RAW_TRANSACTIONS[0])
+
+
+def test_submit_retry_transient_rpc_errors():
+    provider = FakeProvider(rpc_failures=[
+        {'code': -32005, 'message': 'request rate exceeded'},
+        {'code': -32000, 'message': 'header not found'}
+    ])
+    submitter = TransactionSubmitter(provider, backoff_factor=0)
+
+    assert asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:1])) == [keccak(RAW_TRANSACTIONS[0])]
+    assert provider.rpc_failures == []
+
+
+def test_submit_raise_rpc_errors_after_retries():
+    provider = FakeProvider(rpc_failures=[{'code': -32005, 'message': 'limit exceeded'}] * 3)
+    submitter = TransactionSubmitter(provider, retries=1, backoff_factor=0)
+
+    with pytest.raises(TransactionSubmissionError, match='limit exceeded'):
+        asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:1]))
+
+    assert len(provider.rpc_failures) == 1
+
+
+def test_submit_retry_configured_rpc_errors():
+    provider = FakeProvider(rpc_failures=[{'code': -32603, 'message': 'busy'}])
+    submitter = TransactionSubmitter(
+        provider, backoff_factor=0, retryable_codes={-32603}, retryable_messages=())
+
+    assert asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:1])) == [keccak(RAW_TRANSACTIONS[0])]
+
+
+def test_submit_raise_after_retries():
+    submitter = TransactionSubmitter(FakeProvider(failures=5), retries=1, backoff_factor=0)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:1]))
+
+
+def test_submit_accept_already_known_transactions():
+    submitter = TransactionSubmitter(FakeProvider(error='already known'))
+
+    assert asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:1])) == [keccak(RAW_TRANSACTIONS[0])]
+
+
+def test_submit_raise_rpc_errors():
+    submitter = TransactionSubmitter(FakeProvider(error='nonce too low'))
+
+    with pytest.raises(TransactionSubmissionError, match='nonce too low'):
+        asyncio.run(submitter.submit_all(RAW_TRANSACTIONS[:2]))
+
+
+PRIVATE_KEY = '0x' + '11' * 32
+ADDRESS = Account.from_key(PRIVATE_KEY).address
+
+
+def build_nonce_manager(count):
+    endpoint = MagicMock()
+    endpoint.eth.getTransactionCount.return_value = count
+    return NonceManager(endpoint)
+
+
+def sign(nonce):
+    return Account.sign_transaction({
+        'to': ADDRESS, 'value': 0, 'gas': 21000, 'gasPrice': 0,
+        'nonce': nonce, 'chainId': 1
+    }, PRIVATE_KEY).rawTransaction
+
+
+def test_submit_reconcile_nonce_errors():
+    nonce_manager = build_nonce_manager(3)
+    nonces = nonce_manager.reserve(ADDRESS, 2)
+    nonce_manager.endpoint.eth.getTransactionCount.return_value = 9
+    submitter = TransactionSubmitter(
+        FakeProvider(error='nonce too low'), nonce_manager=nonce_manager, address=ADDRESS)
+
+    with pytest.raises(TransactionSubmissionError):
+        asyncio.run(submitter.submit_all(map(sign, nonces)))
+
+    assert nonce_manager.next_nonce(ADDRESS) == 9
+
+
+def to_hex(raw_transaction):
+    return '0x' + bytes(raw_transaction).hex()
+
+
+class ScriptedProvider:
+    '''
+        Answers every raw transaction with its error, if any, after its
+        delay and records the order of events
+    '''
+
+    def __init__(self, script):
+        self.script = script
+        self.events = []
+
+    async def make_request(self, method, params):
+        delay, error = self.script[params[0]]
+        await asyncio.sleep(delay)
+        self.events.append(params[0])
+
+        if error is not None:
+            return {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32000, 'message': error}}
+        return {'jsonrpc': '2.0', 'id': 1, 'result': '0x' + keccak(hexstr=params[0]).hex()}
+
+
+def test_submit_reconcile_once_transactions_in_flight_settle():
+    nonce_manager = build_nonce_manager(3)
+    first, second = map(sign, nonce_manager.reserve(ADDRESS, 2))
+    provider = ScriptedProvider({
+        to_hex(first): (0, 'nonce too low'),
+        to_hex(second): (0.05, None)
+    })
+    nonce_manager.endpoint.eth.getTransactionCount.side_effect = \
+        lambda *args: provider.events.append('reconcile') or 5
+    submitter = TransactionSubmitter(provider, nonce_manager=nonce_manager, address=ADDRESS)
+
+    with pytest.raises(TransactionSubmissionError):
+        asyncio.run(submitter.submit_all([first, second]))
+
+    assert provider.events == [to_hex(first), to_hex(second), 'reconcile']
+    assert nonce_manager.next_nonce(ADDRESS) == 5
+
+
+def test_submit_reconcile_when_rejected_nonce_leaves_a_gap():
+    nonce_manager = build_nonce_manager(3)
+    first, second = map(sign, nonce_manager.reserve(ADDRESS, 2))
+    provider = ScriptedProvider({
+        to_hex(first): (0, 'insufficient funds for gas * price + value'),
+        to_hex(second): (0.01, None)
+    })
+    submitter = TransactionSubmitter(provider, nonce_manager=nonce_manager, address=ADDRESS)
+
+    with pytest.raises(TransactionSubmissionError):
+        asyncio.run(submitter.submit_all([first, second]))
+
+    # Nonce 3 could not be released with 4 handed out after it
+    assert nonce_manager.endpoint.eth.getTransactionCount.call_count == 2
+    assert nonce_manager.next_nonce(ADDRESS) == 3
+
+
+def test_submit_reconcile_stale_address_before_sending():
+    nonce_manager = build_nonce_manager(3)
+    first, second = map(sign, nonce_manager.reserve(ADDRESS, 2))
+    provider = ScriptedProvider({
+        to_hex(first): (0, 'nonce too high'),
+        to_hex(second): (0, None)
+    })
+    nonce_manager.endpoint.eth.getTransactionCount.side_effect = \
+        lambda *args: provider.events.append('reconcile') or 3
+    submitter = TransactionSubmitter(provider, nonce_manager=nonce_manager, address=ADDRESS)
+
+    async def submit():
+        failed = await submitter.submit(first)
+        await asyncio.wait([failed])
+        return await (await submitter.submit(second))
+
+    asyncio.run(submit())
+
+    assert provider.events == [to_hex(first), 'reconcile', to_hex(second)]
+
+
+def test_submit_release_nonce_of_rejected_transaction():
+    nonce_manager = build_nonce_manager(3)
+    nonce = nonce_manager.next_nonce(ADDRESS)
+    submitter = TransactionSubmitter(
+        FakeProvider(error='insufficient funds for gas * price + value'),
+        nonce_manager=nonce_manager, address=ADDRESS)
+
+    with pytest.raises(TransactionSubmissionError):
+        asyncio.run(submitter.submit_all([sign(nonce)]))
+
+    assert nonce_manager.next_nonce(ADDRESS) == 3
+    nonce_manager.endpoint.eth.getTransactionCount.assert_called_once()
+
+
+def test_submitter_require_address_with_nonce_manager():
+    with pytest.raises(ValueError):
+        TransactionSubmitter(FakeProvider(), nonce_manager=build_nonce_manager(0))
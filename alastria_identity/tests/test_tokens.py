@@ -1,11 +1,14 @@
 from mock import *
 import time
+import pytest
 from hexbytes import HexBytes
+from jwcrypto import jwk
 
 from eth_keys import keys
 from eth_utils import decode_hex
 
-from alastria_identity.services import TokenService
+from alastria_identity.services import TokenService, KeyCache
+from alastria_identity.exceptions import InvalidTokenError
 from alastria_identity.types import (
     NetworkDid,
     JwtToken,
@@ -559,4 +562,203 @@ def test_create_presentation_request_all_args():
         jwk='0x123456'
     ).build_jwt()
 
-    assert jwt == expected_jwt
\ No newline at end of file
+    assert jwt == expected_jwt
+
+def test_jwt_verification_reuses_cached_verifying_key():
+    jwt = JwtToken(
+        header={
+            "alg": "ES256K",
+            "typ": "JWT"
+        },
+        payload={
+            "iss": "iss",
+            "exp": 1
+        })
+    cache = KeyCache(maxsize=10)
+    service = TokenService(
+        private_key=first_private_key, verifying_key_cache=cache)
+    signed_jwt = service.sign_jwt(jwt)
+
+    assert service.verify_jwt(signed_jwt, first_public_key)
+    assert service.verify_jwt(signed_jwt, first_public_key)
+    assert not service.verify_jwt(signed_jwt, second_public_key)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+    assert len(cache) == 2
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_verify_many_return_results_in_input_order(executor):
+    jwt = JwtToken(
+        header={
+            "alg": "ES256K",
+            "typ": "JWT"
+        },
+        payload={
+            "iss": "iss",
+            "exp": 1
+        })
+    service = TokenService(private_key=first_private_key)
+    signed_jwt = service.sign_jwt(jwt)
+    tokens = [
+        (signed_jwt, first_public_key),
+        (signed_jwt, second_public_key),
+        (signed_jwt, first_public_key)
+    ]
+
+    results = service.verify_many(
+        tokens, executor=executor, max_workers=2, chunk_size=2)
+
+    assert list(results) == [True, False, True]
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_sign_many_yield_signed_tokens_in_input_order(executor):
+    tokens = [
+        JwtToken(
+            header={"alg": "ES256K", "typ": "JWT"},
+            payload={"iss": "iss", "jti": str(index)})
+        for index in range(5)
+    ]
+    service = TokenService(private_key=first_private_key)
+
+    signed_tokens = list(service.sign_many(
+        iter(tokens), executor=executor, max_workers=2, chunk_size=2))
+
+    assert len(signed_tokens) == len(tokens)
+    for token, signed_jwt in zip(tokens, signed_tokens):
+        assert service.verify_jwt(signed_jwt, first_public_key)
+        assert TokenService.decode_jwt(signed_jwt)['payload'] == token.payload
+
+
+def test_token_services_with_same_key_share_signing_key():
+    registry = KeyCache(maxsize=10)
+
+    first_service = TokenService(
+        private_key=first_private_key, signing_key_registry=registry)
+    second_service = TokenService(
+        private_key=f'0x{first_private_key}', signing_key_registry=registry)
+    other_service = TokenService(
+        private_key=second_private_key, signing_key_registry=registry)
+
+    assert first_service.signing_key is second_service.signing_key
+    assert first_service.signing_key is not other_service.signing_key
+    assert len(registry) == 2
+
+
+def test_signing_key_is_a_jwk_by_default():
+    service = TokenService(private_key=first_private_key, signing_key_registry=KeyCache())
+
+    assert isinstance(service.signing_key, jwk.JWK)
+    assert not hasattr(service, 'private_key')
+
+
+def test_decode_jwt_lazy_match_decode_jwt():
+    jwt = JwtToken(
+        header={
+            "alg": "ES256K",
+            "typ": "JWT",
+            "kid": "kid"
+        },
+        payload={
+            "iss": "iss",
+            "exp": 1
+        })
+    service = TokenService(private_key=first_private_key)
+    signed_jwt = service.sign_jwt(jwt)
+
+    decoded_jwt = TokenService.decode_jwt_lazy(signed_jwt)
+
+    assert decoded_jwt.header == TokenService.decode_jwt(signed_jwt)['header']
+    assert decoded_jwt.payload == jwt.payload
+    assert decoded_jwt.signing_input == signed_jwt.rsplit('.', 1)[0].encode()
+    assert len(decoded_jwt.signature) == 64
+
+
+def test_decode_jwt_lazy_only_parse_payload_when_accessed():
+    decoded_jwt = TokenService.decode_jwt_lazy('eyJhbGciOiJFUzI1NksifQ.not-json.c2ln')
+
+    assert decoded_jwt.header == {'alg': 'ES256K'}
+    with pytest.raises(InvalidTokenError):
+        decoded_jwt.payload
+
+
+def test_decode_jwt_lazy_raise_with_malformed_token():
+    with pytest.raises(InvalidTokenError):
+        TokenService.decode_jwt_lazy('not-a-jwt')
+
+
+def test_decode_jwt_lazy_raise_with_non_object_parts():
+    # The header is [1,2] and the payload "exp"
+    decoded_jwt = TokenService.decode_jwt_lazy('WzEsMl0.ImV4cCI.c2ln')
+
+    with pytest.raises(InvalidTokenError):
+        decoded_jwt.header
+    with pytest.raises(InvalidTokenError):
+        decoded_jwt.payload
+    assert TokenService.get_expiration('WzEsMl0.ImV4cCI.c2ln') is None
+
+
+def test_verification_cache_reuse_results_until_token_expires():
+    jwt = JwtToken(
+        header={
+            "alg": "ES256K",
+            "typ": "JWT"
+        },
+        payload={
+            "iss": "iss",
+            "exp": int(time.time()) + 2
+        })
+    cache = KeyCache(maxsize=10)
+    service = TokenService(
+        private_key=first_private_key, verification_cache=cache)
+    signed_jwt = service.sign_jwt(jwt)
+
+    with patch.object(TokenService, 'verify_jwt_signature', wraps=service.verify_jwt_signature) as verify_jwt_signature:
+        assert service.verify_jwt(signed_jwt, first_public_key)
+        assert service.verify_jwt(signed_jwt, first_public_key)
+        assert verify_jwt_signature.call_count == 1
+
+        with patch('time.time', return_value=time.time() + 5):
+            assert service.verify_jwt(signed_jwt, first_public_key)
+        assert verify_jwt_signature.call_count == 2
+
+    assert cache.stats()['hit_rate'] == 1 / 3
+
+
+def test_verification_cache_skip_negative_results_by_default():
+    jwt = JwtToken(
+        header={
+            "alg": "ES256K",
+            "typ": "JWT"
+        },
+        payload={
+            "iss": "iss"
+        })
+    service = TokenService(
+        private_key=first_private_key, verification_cache=KeyCache())
+    negative_service = TokenService(
+        private_key=first_private_key, verification_cache=KeyCache(),
+        cache_negative_results=True)
+    signed_jwt = service.sign_jwt(jwt)
+
+    assert not service.verify_jwt(signed_jwt, second_public_key)
+    assert not negative_service.verify_jwt(signed_jwt, second_public_key)
+
+    assert len(service.verification_cache) == 0
+    assert len(negative_service.verification_cache) == 1
+
+
+@pytest.mark.parametrize('executor', ['serial', 'process'])
+def test_psm_hash_many_match_psm_hash(executor):
+    pairs = [
+        (f'header.payload{index}.signature', f'did:ala:quor:redT:{index}')
+        for index in range(10)
+    ]
+
+    digests = TokenService.psm_hash_many(
+        iter(pairs), executor=executor, max_workers=2, chunk_size=3)
+
+    assert len(digests) == 32 * len(pairs)
+    for index, (signed_jwt, did) in enumerate(pairs):
+        assert digests[32 * index:32 * (index + 1)] == TokenService.psm_hash(signed_jwt, did)
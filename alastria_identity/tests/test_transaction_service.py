@@ -1,3 +1,4 @@
+import pytest
 from mock import Mock, patch
 from unittest.mock import patch
 
@@ -35,3 +36,87 @@ def test_is_delegated_call_return_true():
     is_delegated = transaction.is_delegated_call()
 
     assert is_delegated
+
+
+def test_delegated_reuse_identity_manager_handler():
+    contract_config = {
+        'AlastriaIdentityManager': {
+            'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9',
+            'functions': {'delegateCall': {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}}}}
+    endpoint = Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    transaction = TransactionService(
+        config=contract_config,
+        contract_name='AlastriaIdentityManager',
+        endpoint=endpoint)
+
+    with patch.object(endpoint.eth, 'contract') as contract:
+        first = transaction.delegated('0x1234')
+        second = transaction.delegated('0x1234')
+
+    contract.assert_not_called()
+    assert first == second
+
+
+def test_generate_delegated_transaction_match_encode_abi():
+    delegate_call = {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+    add_key = {'constant': False, 'inputs': [{'name': 'publicKey', 'type': 'string'}], 'name': 'addKey', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+    contract_config = {
+        'AlastriaIdentityManager': {'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9', 'functions': {'delegateCall': delegate_call}},
+        'AlastriaPublicKeyRegistry': {'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d', 'functions': {'addKey': add_key}}}
+    endpoint = Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    transaction = TransactionService(
+        config=contract_config,
+        contract_name='AlastriaPublicKeyRegistry',
+        endpoint=endpoint).enable_delegated_call()
+    manager = endpoint.eth.contract(abi=[delegate_call])
+    registry = endpoint.eth.contract(abi=[add_key])
+
+    for public_key in ['', 'a' * 31, 'a' * 32, 'a' * 130]:
+        inner = registry.encodeABI(fn_name='addKey', args=[public_key])
+        expected = manager.encodeABI(
+            fn_name='delegateCall',
+            args=['0x57a9604784f82E5637624ca9c87015aaa31E300D', 0, inner])
+
+        assert transaction.generate_transaction('addKey', [public_key]).data == expected
+        assert transaction.delegated(inner) == expected
+
+
+DELEGATE_CALL = {'constant': False, 'inputs': [{'name': '_destination', 'type': 'address'}, {'name': '_value', 'type': 'uint256'}, {'name': '_data', 'type': 'bytes'}], 'name': 'delegateCall', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+ADD_SUBJECT_CREDENTIAL = {'constant': False, 'inputs': [{'name': 'subjectCredentialHash', 'type': 'bytes32'}, {'name': 'URI', 'type': 'string'}], 'name': 'addSubjectCredential', 'outputs': [], 'payable': False, 'stateMutability': 'nonpayable', 'type': 'function'}
+REGISTRY_CONFIG = {
+    'AlastriaIdentityManager': {'address': '0xbd4a2c84edb97be5beff7cd341bd63567e73f8c9', 'functions': {'delegateCall': DELEGATE_CALL}},
+    'AlastriaCredentialRegistry': {'address': '0x57a9604784f82e5637624ca9c87015aaa31e300d', 'functions': {'addSubjectCredential': ADD_SUBJECT_CREDENTIAL}}}
+CREDENTIAL_ARGS = [['0x' + f'{index:064x}', f'https://credentials/{index}'] for index in range(20)]
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_generate_transactions_match_generate_transaction(executor):
+    transaction = TransactionService(
+        config=REGISTRY_CONFIG,
+        contract_name='AlastriaCredentialRegistry',
+        endpoint=Web3(Web3.HTTPProvider('https://127.0.0.1/rpc'))
+    ).enable_delegated_call()
+
+    transactions = transaction.generate_transactions(
+        'addSubjectCredential', iter(CREDENTIAL_ARGS),
+        executor=executor, max_workers=2, chunk_size=3)
+
+    assert list(transactions) == [
+        transaction.generate_transaction('addSubjectCredential', args)
+        for args in CREDENTIAL_ARGS
+    ]
+
+
+def test_generate_transactions_return_raw_calldata():
+    transaction = TransactionService(
+        config=REGISTRY_CONFIG,
+        contract_name='AlastriaCredentialRegistry',
+        endpoint=Web3(Web3.HTTPProvider('https://127.0.0.1/rpc')))
+
+    calldata = list(transaction.generate_transactions(
+        'addSubjectCredential', CREDENTIAL_ARGS[:2], raw=True))
+
+    assert calldata == [
+        bytes.fromhex(transaction.generate_transaction('addSubjectCredential', args).data[2:])
+        for args in CREDENTIAL_ARGS[:2]
+    ]
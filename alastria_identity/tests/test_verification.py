@@ -0,0 +1,123 @@
+import pytest
+from mock import Mock, patch
+from eth_keys import keys
+from eth_utils import decode_hex
+
+from alastria_identity.services import TokenService, TokenVerifier, JtiReplayIndex
+from alastria_identity.types import AlastriaToken, AlastriaSession, JwtToken
+
+private_key = '1da6847600b0ee25e9ad9a52abbd786dd2502fa4005dd5af9310b7cc7a3b25db'
+public_key = keys.PrivateKey(decode_hex(private_key)).public_key.to_hex()
+NOW = 1600000000
+
+
+def sign(jwt):
+    return TokenService(private_key).sign_jwt(JwtToken(**jwt))
+
+
+def build_alastria_token(**kwargs):
+    with patch('time.time', return_value=NOW):
+        return sign(AlastriaToken(
+            'did:ala:quor:redT:issuer', 'gwu', 'cbu', 'ani', **kwargs
+        ).build_jwt())
+
+
+def test_verify_accept_valid_token():
+    token = build_alastria_token(exp=NOW + 60, nbf=NOW - 60)
+    verifier = TokenVerifier(clock=lambda: NOW)
+
+    result = verifier.verify(token, public_key)
+
+    assert result.valid
+    assert result.stage is None
+
+
+@patch.object(TokenService, 'verify_jwt_signature')
+def test_verify_reject_expired_token_before_signature(verify_jwt_signature):
+    token = build_alastria_token(exp=NOW - 10)
+    verifier = TokenVerifier(clock=lambda: NOW)
+
+    result = verifier.verify(token, public_key)
+
+    assert not result
+    assert result.stage == 'exp'
+    verify_jwt_signature.assert_not_called()
+
+
+def test_verify_accept_expired_token_within_leeway():
+    token = build_alastria_token(exp=NOW - 10)
+    verifier = TokenVerifier(leeway=30, clock=lambda: NOW)
+
+    assert verifier.verify(token, public_key).valid
+
+
+def test_verify_reject_session_not_valid_yet():
+    with patch('time.time', return_value=NOW):
+        token = sign(AlastriaSession(
+            [], [], 'did:ala:quor:redT:subject', 'at', nbf=NOW + 100
+        ).build_jwt())
+    verifier = TokenVerifier(clock=lambda: NOW)
+
+    result = verifier.verify(token, public_key)
+
+    assert result.stage == 'nbf'
+
+
+def test_verify_reject_unknown_issuer_and_wrong_key():
+    token = build_alastria_token(exp=NOW + 60)
+    wrong_public_key = keys.PrivateKey(decode_hex(
+        '5f25043160494cc82f7054ea935ebb7d9ac67bbe336ddf11b3b61b8d4731009e'
+    )).public_key.to_hex()
+
+    issuer_result = TokenVerifier(
+        allowed_issuers=['did:ala:quor:redT:other'], clock=lambda: NOW
+    ).verify(token, public_key)
+    signature_result = TokenVerifier(
+        clock=lambda: NOW).verify(token, wrong_public_key)
+
+    assert issuer_result.stage == 'iss'
+    assert signature_result.stage == 'signature'
+
+
+def test_verify_run_stages_in_given_order():
+    token = build_alastria_token(exp=NOW - 10)
+    custom_stage = Mock(return_value='Rejected first', __name__='custom')
+    verifier = TokenVerifier(
+        stages=[custom_stage, 'exp', 'signature'], clock=lambda: NOW)
+
+    result = verifier.verify(token, public_key)
+
+    assert result.stage == 'custom'
+    assert result.reason == 'Rejected first'
+
+
+def test_verify_reject_malformed_token():
+    result = TokenVerifier().verify('not-a-jwt', public_key)
+
+    assert result.stage == 'format'
+
+
+@pytest.mark.parametrize('jwt_data', [
+    'a.b.c',
+    # A [1,2] header and a valid payload
+    'WzEsMl0.eyJpc3MiOiJpc3MifQ.c2ln',
+    # A valid header and a "exp" payload
+    'eyJhbGciOiJFUzI1NksifQ.ImV4cCI.c2ln'
+])
+def test_verify_reject_undecodable_parts_as_format(jwt_data):
+    result = TokenVerifier().verify(jwt_data, public_key)
+
+    assert not result.valid
+    assert result.stage == 'format'
+
+
+def test_verify_reject_replayed_jti():
+    token = build_alastria_token(exp=NOW + 60, jti='jti-1')
+    verifier = TokenVerifier(
+        replay_index=JtiReplayIndex(clock=lambda: NOW), clock=lambda: NOW)
+
+    first_result = verifier.verify(token, public_key)
+    second_result = verifier.verify(token, public_key)
+
+    assert first_result.valid
+    assert second_result.stage == 'jti'
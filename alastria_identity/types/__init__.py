@@ -12,6 +12,12 @@ from .entity import Entity
 from .credential import Credential
 from .presentation_request import PresentationRequest, PresentationRequestData
 from .config_parser import ConfigParser
+from .crypto_backend import CryptoBackend
+from .decoded_jwt import DecodedJwt
+from .verification_result import VerificationResult
+from .replay_index import ReplayIndex
+from .config_changes import ConfigChanges
+from .decoded_call import DecodedCall
 
 DEFAULT_GAS_LIMIT = 600000
 DEFAULT_NONCE = '0x0'
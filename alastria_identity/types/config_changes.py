@@ -0,0 +1,21 @@
+from typing import List
+from dataclasses import dataclass, field
+
+
+@dataclass
+class ConfigChanges:
+    """Contracts that changed in a config refresh.
+
+    :param added: Contracts new in ContractInfo.md
+    :param changed: Contracts whose ABI url or address changed
+    :param removed: Contracts no longer in ContractInfo.md
+    :param version: Version of the live config after the refresh
+    """
+
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    version: int = 0
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
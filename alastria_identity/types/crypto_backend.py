@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+
+
+class CryptoBackend(ABC):
+    name = None
+
+    @abstractmethod
+    def load_signing_key(self, private_key: bytes): pass
+
+    @abstractmethod
+    def load_verifying_key(self, public_key: bytes): pass
+
+    def dump_signing_key(self, signing_key) -> bytes:
+        """The raw private key of signing_key, used to load it again in
+        other processes.
+        """
+        raise NotImplementedError(
+            f'{type(self).__name__} signing keys can not be dumped')
+
+    @abstractmethod
+    def sign(self, signing_key, header: dict, payload: dict) -> str: pass
+
+    @abstractmethod
+    def verify(self, verifying_key, jwt_data: str) -> bool: pass
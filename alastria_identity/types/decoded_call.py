@@ -0,0 +1,32 @@
+from typing import Optional
+from dataclasses import dataclass
+
+
+@dataclass
+class DecodedCall:
+    """Function call read from calldata.
+
+    :param selector: The 4 byte selector of the call, as a hex string
+    :param contract_name: (Optional) Contract the function belongs to
+    :param function_name: (Optional) None when no contract of the config
+    has a function with that selector
+    :param args: The decoded arguments, in ABI order
+    :param inner: (Optional) Call wrapped by a delegateCall
+    :param error: (Optional) Why the arguments could not be decoded
+    """
+
+    selector: str
+    contract_name: str = None
+    function_name: str = None
+    args: tuple = ()
+    inner: Optional['DecodedCall'] = None
+    error: str = None
+
+    @property
+    def innermost(self) -> 'DecodedCall':
+        call = self
+
+        while call.inner is not None:
+            call = call.inner
+
+        return call
@@ -0,0 +1,60 @@
+import json
+import base64
+from functools import cached_property
+
+from alastria_identity.exceptions import InvalidTokenError
+
+
+def base64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class DecodedJwt:
+    """Compact JWT split in its three parts without verifying it.
+
+    The header and the payload are only decoded and parsed the first time
+    they are accessed, so routing on a couple of claims stays cheap. Parts
+    that are not a base64url encoded JSON object raise InvalidTokenError.
+
+    :param jwt_data: Compact serialized JWT
+    """
+
+    def __init__(self, jwt_data: str):
+        parts = jwt_data.split('.')
+
+        if len(parts) != 3:
+            raise InvalidTokenError('A compact JWT must have three parts')
+
+        self.jwt_data = jwt_data
+        self.encoded_header, self.encoded_payload, self.encoded_signature = parts
+
+    @cached_property
+    def header(self) -> dict:
+        return self.parse_json(self.encoded_header)
+
+    @cached_property
+    def payload(self) -> dict:
+        return self.parse_json(self.encoded_payload)
+
+    @cached_property
+    def signature(self) -> bytes:
+        try:
+            return base64url_decode(self.encoded_signature)
+        except ValueError as error:
+            raise InvalidTokenError('Invalid signature encoding') from error
+
+    @property
+    def signing_input(self) -> bytes:
+        # The bytes the signature was computed over, taken as they came
+        return self.jwt_data[:-len(self.encoded_signature) - 1].encode('ascii')
+
+    def parse_json(self, encoded_part: str) -> dict:
+        try:
+            part = json.loads(base64url_decode(encoded_part))
+        except ValueError as error:
+            raise InvalidTokenError('Invalid JWT part') from error
+
+        if not isinstance(part, dict):
+            raise InvalidTokenError('A JWT part must be a JSON object')
+
+        return part
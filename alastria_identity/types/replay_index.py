@@ -0,0 +1,9 @@
+from abc import ABC, abstractmethod
+
+
+class ReplayIndex(ABC):
+    @abstractmethod
+    def check_and_add(self, jti: str, exp: float = None) -> bool: pass
+
+    @abstractmethod
+    def __contains__(self, jti: str) -> bool: pass
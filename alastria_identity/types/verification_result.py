@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class VerificationResult:
+    """Outcome of a token verification.
+
+    :param valid: Whether every stage accepted the token
+    :param stage: (Optional) Name of the stage that rejected the token
+    :param reason: (Optional) Why that stage rejected it
+    """
+
+    valid: bool
+    stage: str = None
+    reason: str = None
+
+    def __bool__(self):
+        return self.valid